@@ -24,6 +24,7 @@ __all__ = [
 
 
 import numpy as np
+import pandas as pd
 
 
 def wentworth_gs(phi):
@@ -213,3 +214,75 @@ def folk_kurt(kurtosis):
         kurt = np.nan
 
     return kurt
+
+
+# class names of each classification, in order of grain size or statistic
+_WENTWORTH = ['very coarse sand', 'coarse sand', 'medium sand', 'fine sand', 'very fine sand',
+              'coarse silt', 'medium silt', 'fine silt', 'very fine silt', 'clay']
+_FOLK_SED = ['sand', 'silty sand', 'muddy sand', 'clayey sand', 'sandy silt', 'sandy mud',
+             'sandy clay', 'silt', 'mud', 'clay']
+_FOLK_SORT = ['very well sorted', 'well sorted', 'moderately well sorted', 'moderately sorted',
+              'poorly sorted', 'very poorly sorted', 'extremely poorly sorted']
+_FOLK_SKEW = ['strongly coarse skewed', 'coarse skewed', 'near symmetrical', 'fine skewed',
+              'strongly fine skewed']
+_FOLK_KURT = ['very platykurtic', 'platykurtic', 'mesokurtic', 'leptokurtic',
+              'very leptokurtic', 'extremely leptokurtic']
+
+
+def _categorical(conditions, categories, ordered=True):
+    """Hidden function to collect the first class of each value whose condition is True as a pandas Categorical; values meeting no condition are missing."""
+    codes = np.select(conditions, np.arange(len(categories)), -1)
+
+    return pd.Categorical.from_codes(codes, categories=categories, ordered=ordered)
+
+
+def _wentworth_cat(phi):
+    """Hidden function to classify an array of grain sizes in phi units as wentworth_gs, returning a pandas Categorical."""
+    phi = np.asarray(phi, dtype=float)
+    conditions = [(lo <= phi) & (phi < lo + 1) for lo in range(-1, 8)] + [8 <= phi]
+
+    return _categorical(conditions, _WENTWORTH)
+
+
+def _folk_sed_cat(sand, silt, clay):
+    """Hidden function to classify arrays of sand, silt, and clay percentages as folk_sed, returning a pandas Categorical."""
+    sand, silt, clay = [np.asarray(x, dtype=float) for x in (sand, silt, clay)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        silty = silt / clay >= 2
+        clayey = clay / silt >= 2
+    mud = ~silty & ~clayey
+
+    # silty, muddy, and clayey classes of each band of sand percentage
+    conditions = [sand >= 90]
+    for band in ((50 <= sand) & (sand < 90), (10 <= sand) & (sand < 50), sand < 10):
+        conditions += [band & silty, band & mud, band & clayey]
+
+    return _categorical(conditions, _FOLK_SED, ordered=False)
+
+
+def _folk_sort_cat(sorting):
+    """Hidden function to classify an array of sorting values as folk_sort, returning a pandas Categorical."""
+    x = np.asarray(sorting, dtype=float)
+    limits = [0.35, 0.5, 0.71, 1.0, 2.0, 4.0]
+    conditions = [x <= limits[0]] + [(lo < x) & (x <= hi) for lo, hi in zip(limits, limits[1:])] + \
+        [limits[-1] < x]
+
+    return _categorical(conditions, _FOLK_SORT)
+
+
+def _folk_skew_cat(skewness):
+    """Hidden function to classify an array of skewness values as folk_skew, returning a pandas Categorical."""
+    x = np.asarray(skewness, dtype=float)
+    conditions = [(0.3 < x) & (x <= 1), (0.1 < x) & (x <= 0.3), (-0.1 <= x) & (x <= 0.1),
+                  (-0.3 <= x) & (x < -0.1), (-1.0 <= x) & (x < -0.1)]
+
+    return _categorical(conditions, _FOLK_SKEW)
+
+
+def _folk_kurt_cat(kurtosis):
+    """Hidden function to classify an array of kurtosis values as folk_kurt, returning a pandas Categorical."""
+    x = np.asarray(kurtosis, dtype=float)
+    conditions = [(0.41 <= x) & (x <= 0.67), (0.67 < x) & (x <= 0.9), (0.9 < x) & (x <= 1.10),
+                  (1.10 < x) & (x <= 1.5), (1.5 < x) & (x <= 3.0), 3.0 < x]
+
+    return _categorical(conditions, _FOLK_KURT)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains two-sample tests comparing the grain size distributions of two sets of samples, e.g. two lithologies or areas, per bin, per statistic, and of mean cumulative curves. Tests are permutation tests, with permutations calculated in blocks as matrix products.
+
+
+--------------------------------------
+Copyright 2021-2022 Matthew A. Massey
+
+This file is part of GrainPy.
+
+GrainPy is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version. GrainPy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with GrainPy. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+__all__ = [
+    "Comparison",
+    "compare",
+]
+
+
+import numpy as np
+import pandas as pd
+
+
+# numeric statistics of datast() compared between sets of samples
+_STATS = ['sand', 'silt', 'clay', 'max', 'min', 'median', 'mean_folk', 'sorting_folk',
+          'skewness_folk', 'kurtosis_folk']
+
+# largest number of permutations times samples in one block
+_PERM_BLOCK = 2 ** 22
+
+
+class Comparison():
+    """
+    Class for results of two-sample tests between samples of a and b. P-values are two-sided, from permutations of samples between a and b.
+
+    Parameters
+    ----------
+    bins : Dataframe
+        Dataframe of bins in phi units, means of a and b, difference of means (a - b), and p-value of each bin, with bins as rows ordered as GrainSizeDist.bins().
+    stats : Dataframe
+        Dataframe of means of a and b, difference of means (a - b), and p-value of numeric statistics of datast(), with statistics as rows.
+    ks : float
+        largest absolute difference between mean cumulative curves of a and b (%)
+    ks_p : float
+        p-value of ks
+    n_a : integer
+        number of samples of a
+    n_b : integer
+        number of samples of b
+    n_perm : integer
+        number of permutations
+
+    """
+
+    def __init__(self, bins, stats, ks, ks_p, n_a, n_b, n_perm):
+        self.bins = bins
+        self.stats = stats
+        self.ks = ks
+        self.ks_p = ks_p
+        self.n_a = n_a
+        self.n_b = n_b
+        self.n_perm = n_perm
+
+
+def _permutations(rng, n_a, n, n_perm):
+    """Hidden function to yield blocks of permutations as permutations-by-samples indicator matrices of samples assigned to a."""
+    labels = np.zeros(n)
+    labels[:n_a] = 1
+    size = max(1, _PERM_BLOCK // n)
+    for start in range(0, n_perm, size):
+        yield rng.permuted(np.tile(labels, (min(size, n_perm - start), 1)), axis=1)
+
+
+def _pvalue(exceed, n_perm):
+    """Hidden function to calculate permutation p-values from numbers of permutations at least as extreme as observed, counting the observed assignment."""
+    return (exceed + 1) / (n_perm + 1)
+
+
+def compare(a, b, n_perm=10000, prom=0.1, seed=None):
+    """
+    Function to test differences between grain size distributions of samples of two GrainSizeDist objects, e.g. two groups from GrainSizeGroups.get_group(). Permutation tests are calculated for the mean of each bin, the mean of each numeric statistic of datast() (e.g. mean_folk), and the largest difference between mean cumulative curves (a Kolmogorov-Smirnov-style statistic). All tests use the same permutations of samples between a and b.
+
+    Parameters
+    ----------
+    a : GrainSizeDist object
+        first set of samples
+    b : GrainSizeDist object
+        second set of samples, with the same bins as a
+    n_perm : integer, optional
+        number of permutations. The default is 10000.
+    prom : integer or float, optional
+        Peak prominence used for statistics of datast(). The default is 0.1.
+    seed : integer, optional
+        seed of random permutations, for repeatable results. The default is None.
+
+    Returns
+    -------
+    result : Comparison object
+        Differences and p-values per bin, per statistic, and of mean cumulative curves.
+
+    """
+    ca, cb = a._compiled(), b._compiled()
+    if not np.allclose(ca.microns, cb.microns):
+        raise ValueError('a and b must have the same bins')
+    n_a, n_b = len(ca.values), len(cb.values)
+    if n_a < 1 or n_b < 1:
+        raise ValueError('a and b must have at least one sample')
+    n = n_a + n_b
+
+    values = np.vstack([np.asarray(ca.values, dtype=float), np.asarray(cb.values, dtype=float)])
+
+    # statistics of samples; missing statistics are left out of means
+    st = pd.concat([a.datast(prom, typed=True).iloc[:-1], b.datast(prom, typed=True).iloc[:-1]])
+    st = st[_STATS].to_numpy(dtype=float)
+    valid = ~np.isnan(st)
+    st = np.where(valid, st, 0)
+    valid = valid.astype(float)
+
+    def diffs(ind):
+        """Differences of means (a - b) of bins and statistics for rows of indicator matrix ind."""
+        sum_a = ind @ values
+        bins = sum_a / n_a - (values.sum(axis=0) - sum_a) / n_b
+        cnt_a = ind @ valid
+        cnt_b = valid.sum(axis=0) - cnt_a
+        sum_a = ind @ st
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats = sum_a / cnt_a - (st.sum(axis=0) - sum_a) / cnt_b
+        return bins, stats
+
+    observed = np.zeros((1, n))
+    observed[0, :n_a] = 1
+    obs_bins, obs_stats = [x[0] for x in diffs(observed)]
+    obs_ks = np.abs(np.cumsum(obs_bins)).max()
+
+    # count permutations with differences at least as large as observed
+    rng = np.random.default_rng(seed)
+    tol = 1e-12
+    ex_bins = np.zeros(values.shape[1])
+    ex_stats = np.zeros(st.shape[1])
+    ex_ks = 0
+    for ind in _permutations(rng, n_a, n, n_perm):
+        bins, stats = diffs(ind)
+        ex_bins += (np.abs(bins) >= np.abs(obs_bins) - tol).sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            ex_stats += (np.abs(stats) >= np.abs(obs_stats) - tol).sum(axis=0)
+        ex_ks += (np.abs(np.cumsum(bins, axis=1)).max(axis=1) >= obs_ks - tol).sum()
+
+    mean_a, mean_b = values[:n_a].mean(axis=0), values[n_a:].mean(axis=0)
+    bins = pd.DataFrame({'phi': ca.phi(), 'mean_a': mean_a, 'mean_b': mean_b,
+                         'diff': obs_bins, 'p_value': _pvalue(ex_bins, n_perm)})
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stat_a = (st[:n_a] * valid[:n_a]).sum(axis=0) / valid[:n_a].sum(axis=0)
+        stat_b = (st[n_a:] * valid[n_a:]).sum(axis=0) / valid[n_a:].sum(axis=0)
+    stats = pd.DataFrame({'mean_a': stat_a, 'mean_b': stat_b, 'diff': obs_stats,
+                          'p_value': np.where(np.isnan(obs_stats), np.nan,
+                                              _pvalue(ex_stats, n_perm))},
+                         index=_STATS)
+
+    return Comparison(bins, stats, obs_ks, _pvalue(ex_ks, n_perm), n_a, n_b, n_perm)
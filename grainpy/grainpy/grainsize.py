@@ -14,46 +14,939 @@ You should have received a copy of the GNU General Public License along with Gra
 """
 
 
+import io
 import os
+import re
+import glob
+import gc
+import asyncio
+import hashlib
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from scipy.signal import find_peaks
 import scipy.stats
-from matplotlib import pyplot as plt
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.patches import Rectangle
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_pdf import PdfPages
 from .classify import *
+from .classify import _wentworth_cat, _folk_sed_cat, _folk_sort_cat, _folk_skew_cat, _folk_kurt_cat
+from .readers import read_sample, read_samples
+
+
+# number of compiled datasets kept in memory by each GrainSizeDist object
+_CACHE_SIZE = 4
+
+# default bin_min, rows, data_col, and bin_col of compiled data, as _compiled(), for samples and subsets of methods without these parameters
+_COMPILE = (0.375198, 93, 1, 0)
+
+# number of datast() results kept in memory by each GrainSizeDist object
+_STATS_SIZE = 8
+
+# number of samples processed at once by block-wise calculations
+_BLOCK_ROWS = 16384
+
+# statistics and number of samples in each page of report tables
+_REPORT_STATS = ['sand', 'silt', 'clay', 'sediment_class', 'median', 'mean_folk',
+                 'sorting_folk', 'sorting_folk_class', 'skewness_folk', 'kurtosis_folk']
+_REPORT_ROWS = 40
+
+# bisection steps inverting PCHIP cumulative curves, to about 1e-9 of a bin
+_PCHIP_ITER = 30
+
+# Matplotlib backends drawing only to files, where plots are saved or returned but not shown
+_HEADLESS = ('agg', 'cairo', 'pdf', 'pgf', 'ps', 'svg', 'template')
+
+# cumulative percentages used by Folk and Ward (1957) statistics
+_FOLK_PERCENTILES = (5, 16, 25, 50, 75, 84, 95)
+
+# largest number of concentration steps of robust location and scatter
+_MCD_STEPS = 50
+
+# smallest variance of robust scatter in any direction, as a fraction of total variance, so that nearly collinear percentiles do not dominate distances
+_MCD_FLOOR = 1e-3
+
+
+class _Compiled():
+    """
+    Hidden container for compiled grain size data. Data are held as one contiguous samples-by-bins array, with bins ordered from coarse to fine as in GrainSizeDist.data(). The array may be a memory-mapped file, so calculations over all samples are done in blocks of _BLOCK_ROWS samples.
+
+    Parameters
+    ----------
+    microns : numpy array
+        lower bin thresholds in microns, ordered from coarse to fine
+    values : numpy array or numpy memmap
+        samples-by-bins array of grain size data, with missing values stored as 0
+    names : pandas Index
+        sample names, one for each row of values
+    sources : numpy array
+        path of the source file for each row of values
+    missing : numpy array, optional
+        (row, bin) coordinates of values missing in source files. The default is None (no missing values).
+    filename : string, optional
+        path of .npy file holding values if memory-mapped. The default is None.
+
+    """
+
+    __slots__ = ('microns', 'values', 'names', 'sources', 'missing', 'filename')
+
+    def __init__(self, microns, values, names, sources, missing=None,
+                 filename=None):
+        self.microns = microns
+        self.values = values
+        self.names = names
+        self.sources = sources
+        self.missing = np.zeros((0, 2), dtype=int) if missing is None else missing
+        self.filename = filename
+
+        # cached arrays are shared by dataframe views, so protect them
+        for arr in (self.microns, self.values, self.missing):
+            arr.flags.writeable = False
+
+    def take(self, rows):
+        """Returns new _Compiled of selected rows (integer positions), with values copied into memory."""
+        rows = np.asarray(rows, dtype=int)
+        values = np.array(self.values[rows])
+
+        # renumber missing value coordinates of selected rows
+        new = np.full(len(self.values), -1)
+        new[rows] = np.arange(len(rows))
+        missing = self.missing.copy()
+        missing[:, 0] = new[missing[:, 0]]
+
+        return _Compiled(self.microns.copy(), values, self.names[rows],
+                         self.sources[rows], missing[missing[:, 0] >= 0])
+
+    def phi(self):
+        """Returns bins in phi units, ordered from coarse to fine."""
+        return -1 * np.log2(self.microns.astype(float) / 1000)
+
+    def blocks(self, cumulative=False):
+        """Yields start row and float64 copy of each block of samples; cumulative percentages if cumulative is True."""
+        for start in range(0, len(self.values), _BLOCK_ROWS):
+            block = np.array(self.values[start:start + _BLOCK_ROWS], dtype=float)
+            if cumulative:
+                block = block.cumsum(axis=1)
+            yield start, block
+
+    def mean(self):
+        """Returns mean of all samples per bin, ignoring values missing in source files."""
+        total = np.zeros(self.values.shape[1])
+        for start, block in self.blocks():
+            total += block.sum(axis=0)
+        count = len(self.values) - np.bincount(self.missing[:, 1],
+                                               minlength=self.values.shape[1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+
+        return np.nan_to_num(mean).astype(self.values.dtype)
+
+    def meansem(self, cumulative=False):
+        """Returns mean and standard error of the mean of all samples per bin in two block-wise passes; of cumulative percentages if cumulative is True."""
+        n = len(self.values)
+        total = np.zeros(self.values.shape[1])
+        for start, block in self.blocks(cumulative):
+            total += block.sum(axis=0)
+        mean = total / n
+
+        ss = np.zeros(self.values.shape[1])
+        for start, block in self.blocks(cumulative):
+            ss += ((block - mean) ** 2).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sem = np.sqrt(ss / (n - 1)) / np.sqrt(n)
+
+        return mean, sem
+
+    def groupmeansem(self, codes, ngroups, cumulative=False):
+        """
+        Returns number of samples, mean, and standard error of the mean per bin for groups of samples, in two block-wise passes over all samples.
+
+        Parameters
+        ----------
+        codes : numpy array
+            integer group of each sample, from 0 to ngroups - 1; samples with negative codes are ignored
+        ngroups : integer
+            number of groups
+        cumulative : Bool, optional
+            Option to calculate for cumulative percentages. The default is False.
+
+        Returns
+        -------
+        n : numpy array
+            number of samples of each group
+        mean : numpy array
+            groups-by-bins array of means
+        sem : numpy array
+            groups-by-bins array of standard errors of the means
+
+        """
+        codes = np.asarray(codes)
+        n = np.bincount(codes[codes >= 0], minlength=ngroups)
+
+        # sums of each group as product of block with group indicator matrix
+        def indicator(start, block):
+            ind = np.zeros((len(block), ngroups))
+            c = codes[start:start + len(block)]
+            ind[np.flatnonzero(c >= 0), c[c >= 0]] = 1
+            return ind
+
+        total = np.zeros((ngroups, self.values.shape[1]))
+        for start, block in self.blocks(cumulative):
+            total += indicator(start, block).T @ block
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / n[:, np.newaxis]
+
+        ss = np.zeros((ngroups, self.values.shape[1]))
+        for start, block in self.blocks(cumulative):
+            ind = indicator(start, block)
+            ss += ind.T @ (block - ind @ np.nan_to_num(mean)) ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sem = np.sqrt(ss / (n[:, np.newaxis] - 1)) / np.sqrt(n[:, np.newaxis])
+
+        return n, mean, sem
+
+    def collapse(self, codes, names):
+        """Returns new _Compiled of the mean of each group of rows, with integer codes from 0 to len(names) - 1; sources are the first row of each group, and values are missing only if missing in all rows of a group."""
+        codes = np.asarray(codes)
+        n, mean, sem = self.groupmeansem(codes, len(names))
+        first = np.unique(codes, return_index=True)[1]
+
+        # bins missing in all rows of a group
+        count = np.zeros(mean.shape, dtype=int)
+        np.add.at(count, (codes[self.missing[:, 0]], self.missing[:, 1]), 1)
+        missing = np.argwhere(count == n[:, np.newaxis])
+
+        return _Compiled(self.microns.copy(), np.nan_to_num(mean).astype(self.values.dtype),
+                         names, self.sources[first], missing)
+
+    def cumulative(self):
+        """Returns samples-by-bins array of cumulative percentages, written block-wise beside values if memory-mapped."""
+        if self.filename is None:
+            return self.values.cumsum(axis=1)
+
+        cpname = os.path.splitext(self.filename)[0] + '_cp.npy'
+        if not os.path.exists(cpname):
+            cp = np.lib.format.open_memmap(cpname + '.tmp', mode='w+', dtype=self.values.dtype,
+                                           shape=self.values.shape)
+            for start, block in self.blocks(cumulative=True):
+                cp[start:start + len(block)] = block
+            cp.flush()
+            del cp
+            os.replace(cpname + '.tmp', cpname)
+
+        return np.load(cpname, mmap_mode='r')
+
+
+def _save_compiled(filename, microns, names, sources, missing):
+    """Hidden function to save bins, names, sources, and missing value coordinates beside a memory-mapped file of compiled data written to filename + '.tmp', then move the file to filename."""
+    np.savez(os.path.splitext(filename)[0] + '_meta.npz', microns=microns,
+             names=np.array(names, dtype=str), sources=np.array(sources, dtype=str),
+             missing=missing)
+    os.replace(filename + '.tmp', filename)
+    _remove_superseded(filename)
+
+
+def _remove_superseded(filename):
+    """Hidden function to remove files of data compiled from the same path(s) and parameters as filename before the files changed on disk (same first digest of the name from _memmap_name), with their cumulative percentages and metadata; files being written (.tmp) or that cannot be removed, e.g. open on Windows, are left."""
+    base = os.path.splitext(filename)[0]
+    for old in glob.glob(glob.escape(base.rsplit('_', 1)[0]) + '_*'):
+        if not old.startswith(base) and not old.endswith('.tmp'):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _load_compiled(filename):
+    """Hidden function to open memory-mapped compiled data saved by _save_compiled; returns None if not saved."""
+    meta = os.path.splitext(filename)[0] + '_meta.npz'
+    if not (os.path.exists(filename) and os.path.exists(meta)):
+        return None
+    with np.load(meta) as m:
+        return _Compiled(m['microns'], np.load(filename, mmap_mode='r'),
+                         pd.Index(m['names'].tolist()),
+                         m['sources'].astype(object), m['missing'], filename)
+
+
+def _place(values, x, col, missing):
+    """Hidden function to place data of one sample in row x of a compiled array; missing values are kept as 0, but their coordinates are appended to missing for means."""
+    miss = np.isnan(col)
+    if miss.any():
+        col[miss] = 0
+        missing += [(x, b) for b in np.flatnonzero(miss)]
+    values[x] = col
+
+
+def _interp_cp(q, cp, phi):
+    """
+    Hidden function to interpolate the grain size (phi) at cumulative percentage q for every row of cumulative percentages cp, equivalent to numpy.interp(q, cp[k], phi) for each row k. A list of percentages is interpolated for all rows in one pass.
+
+    Parameters
+    ----------
+    q : integer, float, or list
+        cumulative percentage(s) to interpolate
+    cp : numpy array
+        samples-by-bins array of cumulative percentages
+    phi : numpy array
+        bins in phi units
+
+    Returns
+    -------
+    out : numpy array
+        grain size in phi units for each sample, or samples-by-percentages array if q is a list
+
+    """
+    q = np.asarray(q, dtype=float)
+    single = q.ndim == 0
+    q = np.atleast_1d(q)
+
+    n, b = cp.shape
+    j = (cp[:, :, np.newaxis] <= q).sum(axis=1) - 1
+    lo = np.clip(j, 0, b - 2)
+    rows = np.arange(n)[:, np.newaxis]
+    x0 = cp[rows, lo]
+    x1 = cp[rows, lo + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = phi[lo] + (q - x0) * (phi[lo + 1] - phi[lo]) / (x1 - x0)
+    out[j < 0] = phi[0]
+    out[j >= b - 1] = phi[-1]
+
+    return out[:, 0] if single else out
+
+
+def _interp_phi(x, phi, cp):
+    """Hidden function to interpolate cumulative percentages at grain size x (phi) for every row of cp, equivalent to numpy.interp(x, phi, cp[k]) for each row k."""
+    if x <= phi[0]:
+        return cp[:, 0].copy()
+    if x >= phi[-1]:
+        return cp[:, -1].copy()
+    j = np.searchsorted(phi, x, side='right') - 1
+    w = (x - phi[j]) / (phi[j + 1] - phi[j])
+
+    return cp[:, j] + w * (cp[:, j + 1] - cp[:, j])
+
+
+def _pchip_edge(h0, h1, m0, m1):
+    """Hidden function to calculate slopes of PCHIP curves at the first or last bin from the two nearest intervals, with shape-preserving limits."""
+    d = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(m0), 0, d)
+    fix = (np.sign(m0) != np.sign(m1)) & (np.abs(d) > np.abs(3 * m0))
+
+    return np.where(fix, 3 * m0, d)
+
+
+def _pchip_slopes(cp, phi):
+    """Hidden function to calculate slopes of monotone piecewise cubic Hermite (PCHIP; Fritsch and Carlson, 1980) curves through every row of cumulative percentages cp at bins phi, equivalent to scipy.interpolate.PchipInterpolator."""
+    h = np.diff(phi)
+    m = np.diff(cp, axis=1) / h
+    d = np.zeros(cp.shape)
+
+    # weighted harmonic mean of slopes of neighbouring intervals, 0 at extrema
+    m0, m1 = m[:, :-1], m[:, 1:]
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d[:, 1:-1] = np.where(m0 * m1 > 0, (w1 + w2) / (w1 / m0 + w2 / m1), 0)
+    d[:, 0] = _pchip_edge(h[0], h[1], m[:, 0], m[:, 1])
+    d[:, -1] = _pchip_edge(h[-1], h[-2], m[:, -1], m[:, -2])
+
+    return d
+
+
+def _hermite(t, y0, y1, d0, d1, h):
+    """Hidden function to evaluate cubic Hermite curves at fractions t of intervals of width h."""
+    t2 = t * t
+    t3 = t2 * t
+
+    return ((2 * t3 - 3 * t2 + 1) * y0 + (t3 - 2 * t2 + t) * h * d0 +
+            (-2 * t3 + 3 * t2) * y1 + (t3 - t2) * h * d1)
+
+
+def _pchip_cp(q, cp, phi, slopes):
+    """
+    Hidden function to interpolate the grain size (phi) at cumulative percentage(s) q for every row of cumulative percentages cp on PCHIP curves with slopes from _pchip_slopes, as _interp_cp. Curves are inverted on the interval containing q of all rows at once by bisection.
+
+    Returns
+    -------
+    out : numpy array
+        grain size in phi units for each sample, or samples-by-percentages array if q is a list
+
+    """
+    q = np.asarray(q, dtype=float)
+    single = q.ndim == 0
+    q = np.atleast_1d(q)
+
+    n, b = cp.shape
+    j = (cp[:, :, np.newaxis] <= q).sum(axis=1) - 1
+    lo = np.clip(j, 0, b - 2)
+    rows = np.arange(n)[:, np.newaxis]
+    y0, y1 = cp[rows, lo], cp[rows, lo + 1]
+    d0, d1 = slopes[rows, lo], slopes[rows, lo + 1]
+    h = phi[lo + 1] - phi[lo]
+
+    # monotone curves: halve interval containing q
+    t0 = np.zeros(lo.shape)
+    t1 = np.ones(lo.shape)
+    for x in range(_PCHIP_ITER):
+        t = (t0 + t1) / 2
+        below = _hermite(t, y0, y1, d0, d1, h) < q
+        t0 = np.where(below, t, t0)
+        t1 = np.where(below, t1, t)
+
+    out = phi[lo] + (t0 + t1) / 2 * h
+    out[j < 0] = phi[0]
+    out[j >= b - 1] = phi[-1]
+
+    return out[:, 0] if single else out
+
+
+def _pchip_phi(x, phi, cp, slopes):
+    """Hidden function to interpolate cumulative percentages at grain size x (phi) for every row of cp on PCHIP curves with slopes from _pchip_slopes, as _interp_phi."""
+    if x <= phi[0]:
+        return cp[:, 0].copy()
+    if x >= phi[-1]:
+        return cp[:, -1].copy()
+    j = np.searchsorted(phi, x, side='right') - 1
+    h = phi[j + 1] - phi[j]
+
+    return _hermite((x - phi[j]) / h, cp[:, j], cp[:, j + 1], slopes[:, j], slopes[:, j + 1], h)
+
+
+def _ssc(cp, phi, slopes=None):
+    """Hidden function to calculate sand, silt, and clay percentages for every row of cumulative percentages cp, on PCHIP curves if slopes are given."""
+    if slopes is None:
+        s = _interp_phi(4, phi, cp)
+        m = _interp_phi(8, phi, cp) - s
+    else:
+        s = _pchip_phi(4, phi, cp, slopes)
+        m = _pchip_phi(8, phi, cp, slopes) - s
+    c = 100 - (m + s)
+
+    return s, m, c
+
+
+def _mahalanobis(X, rows):
+    """Hidden function to calculate squared Mahalanobis distances of all rows of X from the mean and covariance of selected rows, with variances floored at _MCD_FLOOR of total variance."""
+    w, V = np.linalg.eigh(np.cov(X[rows], rowvar=False))
+    w = np.maximum(w, _MCD_FLOOR * w.sum())
+    keep = w > 0
+    proj = (X - X[rows].mean(axis=0)) @ V[:, keep]
+
+    return (proj ** 2 / w[keep]).sum(axis=1)
+
+
+def _consistent(d2, p):
+    """Hidden function to rescale squared distances so that their median is that of the chi-squared distribution of p degrees of freedom, as for normal data."""
+    med = np.median(d2)
+
+    return d2 * scipy.stats.chi2.ppf(0.5, p) / med if med > 0 else d2
+
+
+def _robust_distance(X):
+    """
+    Hidden function to calculate squared robust Mahalanobis distances of all rows of a samples-by-features array, from the location and scatter of the half of samples with smallest scatter (minimum covariance determinant), reweighted by the samples within the 97.5% quantile of distances. The half is found by concentration steps (Rousseeuw and Van Driessen, 1999) started from the samples closest to the median.
+
+    Returns
+    -------
+    d2 : numpy array
+        squared robust distance of each sample
+
+    """
+    n, p = X.shape
+    h = (n + p + 1) // 2
+
+    # start from samples closest to the median, in units of median absolute deviation
+    med = np.median(X, axis=0)
+    mad = np.median(np.abs(X - med), axis=0)
+    mad[mad == 0] = 1
+    d2 = (((X - med) / mad) ** 2).sum(axis=1)
+
+    subset = np.sort(np.argpartition(d2, h - 1)[:h])
+    for x in range(_MCD_STEPS):
+        d2 = _mahalanobis(X, subset)
+        new = np.sort(np.argpartition(d2, h - 1)[:h])
+        if np.array_equal(new, subset):
+            break
+        subset = new
+
+    # reweight from all samples not far from the half
+    d2 = _consistent(d2, p)
+    d2 = _mahalanobis(X, np.flatnonzero(d2 <= scipy.stats.chi2.ppf(0.975, p)))
+
+    return _consistent(d2, p)
+
+
+def _modes(contents, phi, prom):
+    """Hidden function to collect modes of one sample in phi units with peak prominence prom, ordered by decreasing relative proportion."""
+    peak_idx = find_peaks(contents, prominence=prom)[0]
+    mode_val = contents[peak_idx]
+    mode_phi = phi[peak_idx]
+    mode_sort = [y for x, y in sorted(zip(mode_val, mode_phi))]
+
+    return mode_sort[::-1]
+
+
+def _folk(pct):
+    """Hidden function to calculate Folk and Ward (1957) mean, sorting, skewness, and kurtosis from a samples-by-percentiles array of phi at _FOLK_PERCENTILES."""
+    phi5, phi16, phi25, phi50, phi75, phi84, phi95 = pct.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = (phi16 + phi50 + phi84) / 3
+        sort = ((phi84 - phi16) / 4) + ((phi95 - phi5) / 6.6)
+        skew = ((phi16 + phi84 - (2*phi50)) / (2 * (phi84 - phi16))
+                ) + ((phi5 + phi95 - (2*phi50)) / (2 * (phi95 - phi5)))
+        kurt = (phi95 - phi5) / (2.44 * (phi75 - phi25))
+
+    return mean, sort, skew, kurt
+
+
+def _stats(values, phi, prom=0.1, slopes=None):
+    """
+    Hidden function to calculate grain size statistics for all rows of a samples-by-bins array in one vectorized pass.
+
+    Parameters
+    ----------
+    values : numpy array
+        samples-by-bins array of grain size data, with bins ordered from coarse to fine
+    phi : numpy array
+        bins in phi units
+    prom : integer or float, optional
+        Peak prominence used for collecting significant modes in multimodal samples. The default is 0.1.
+    slopes : numpy array, optional
+        samples-by-bins array of PCHIP slopes from _pchip_slopes, for percentiles and sand, silt, and clay on monotone cubic curves. The default is None (linear interpolation).
+
+    Returns
+    -------
+    st : dictionary
+        numeric arrays of statistics for all samples, and a list of mode lists under key 'modes'
+
+    """
+    values = np.asarray(values, dtype=float)
+    cp = values.cumsum(axis=1)
+
+    # stats derived from grain size data
+    present = values > 0
+    first = present.argmax(axis=1)
+    last = values.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+    empty = ~present.any(axis=1)
+    max_ = np.where(empty, np.nan, phi[first])
+    min_ = np.where(empty, np.nan, phi[last])
+    modes = [_modes(contents, phi, prom) for contents in values]
+
+    # stats derived from cumulative percentage data
+    if slopes is None:
+        pct = _interp_cp(_FOLK_PERCENTILES, cp, phi)
+    else:
+        pct = _pchip_cp(_FOLK_PERCENTILES, cp, phi, slopes)
+    phi50 = pct[:, 3]
+    mean, sort, skew, kurt = _folk(pct)
+
+    s, m, c = _ssc(cp, phi, slopes)
+
+    st = {'sand': s, 'silt': m, 'clay': c, 'max': max_, 'min': min_,
+          'median': phi50, 'mean_folk': mean, 'sorting_folk': sort,
+          'skewness_folk': skew, 'kurtosis_folk': kurt, 'modes': modes}
+
+    return st
+
+
+def _concat_stats(blocks):
+    """Hidden function to join statistics from _stats calculated for consecutive blocks of samples."""
+    st = {}
+    for key in blocks[0]:
+        if key == 'modes':
+            st[key] = [modes for block in blocks for modes in block[key]]
+        else:
+            st[key] = np.concatenate([block[key] for block in blocks])
+
+    return st
+
+
+def _stats_frame(st, columns):
+    """Hidden function to arrange statistics from _stats as the dataframe returned by GrainSizeDist.datast(), with samples as columns."""
+    s_list, m_list, c_list = st['sand'], st['silt'], st['clay']
+
+    rows = OrderedDict()
+    rows['sand'] = s_list
+    rows['silt'] = m_list
+    rows['clay'] = c_list
+    rows['silt+clay'] = [str(round(x)) + '+' + str(round(y))
+                         for x, y in zip(m_list, c_list)]
+    rows['sediment_class'] = [
+        folk_sed(x, y, z) for x, y, z in zip(s_list, m_list, c_list)]
+    rows['max'] = st['max']
+    rows['max_ww'] = [wentworth_gs(i) for i in st['max']]
+    rows['min'] = st['min']
+    rows['min_ww'] = [wentworth_gs(i) for i in st['min']]
+    rows['median'] = st['median']
+    rows['median_ww'] = [wentworth_gs(i) for i in st['median']]
+    rows['mean_folk'] = st['mean_folk']
+    rows['mean_folk_ww'] = [wentworth_gs(i) for i in st['mean_folk']]
+    rows['sorting_folk'] = st['sorting_folk']
+    rows['sorting_folk_class'] = [folk_sort(i) for i in st['sorting_folk']]
+    rows['skewness_folk'] = st['skewness_folk']
+    rows['skewness_folk_class'] = [folk_skew(i) for i in st['skewness_folk']]
+    rows['kurtosis_folk'] = st['kurtosis_folk']
+    rows['kurtosis_folk_class'] = [folk_kurt(i) for i in st['kurtosis_folk']]
+
+    # make all mode lists same length then add mode rows
+    mode_list = st['modes']
+    mode_num = len(max(mode_list, key=len))
+    for x in range(mode_num):
+        modes = [m[x] if x < len(m) else np.nan for m in mode_list]
+        rows['mode' + str(x + 1)] = modes
+        rows['mode' + str(x + 1) + '_ww'] = [wentworth_gs(i) for i in modes]
+
+    st = pd.DataFrame([list(r) for r in rows.values()], index=list(rows.keys()),
+                      columns=columns, dtype=object)
+
+    return st
+
+
+def _figure(figsize, dpi=300, pyplot=False):
+    """Hidden function to create a figure with its own canvas outside of pyplot, so that figures can be drawn in several threads at once and are freed when no longer used; with pyplot, a pyplot figure is created so that it can be shown."""
+    if pyplot:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize, dpi=dpi)
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+
+    return fig
+
+
+def _showing(show):
+    """Hidden function to resolve the show parameter of plotting methods; by default, plots are shown if Matplotlib uses an interactive backend (e.g. a window or notebook), and not if headless."""
+    if show is None:
+        return matplotlib.get_backend().lower() not in _HEADLESS
+
+    return bool(show)
+
+
+def _render(fig, fmt, dpi=300):
+    """Hidden function to render a figure as bytes of image format fmt, e.g. 'png' or 'pdf'."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches='tight')
+
+    return buf.getvalue()
+
+
+def _stats_table(st, index):
+    """Hidden function to arrange statistics from _stats as the typed dataframe returned by GrainSizeDist.datast(typed=True), with samples as rows, float64 statistics, and categorical classes."""
+    cols = OrderedDict()
+    for key in ('sand', 'silt', 'clay'):
+        cols[key] = st[key]
+    cols['sediment_class'] = _folk_sed_cat(st['sand'], st['silt'], st['clay'])
+    for key in ('max', 'min', 'median', 'mean_folk'):
+        cols[key] = st[key]
+        cols[key + '_ww'] = _wentworth_cat(st[key])
+    for key, cat in (('sorting_folk', _folk_sort_cat), ('skewness_folk', _folk_skew_cat),
+                     ('kurtosis_folk', _folk_kurt_cat)):
+        cols[key] = st[key]
+        cols[key.replace('_folk', '') + '_folk_class'] = cat(st[key])
+
+    # modes of all samples as one padded array
+    mode_list = st['modes']
+    lengths = np.array([len(m) for m in mode_list], dtype=int)
+    modes = np.full((len(mode_list), lengths.max(initial=0)), np.nan)
+    if lengths.sum() > 0:
+        rows = np.repeat(np.arange(len(mode_list)), lengths)
+        pos = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        modes[rows, pos] = np.concatenate([m for m in mode_list if len(m) > 0])
+    for x in range(modes.shape[1]):
+        cols['mode' + str(x + 1)] = modes[:, x]
+        cols['mode' + str(x + 1) + '_ww'] = _wentworth_cat(modes[:, x])
+
+    return pd.DataFrame(cols, index=index)
 
 
 class GrainSizeDist():
     """
-    Class for collecting, compiling, analyzing, and visualizing grain size distribution data.
+    Class for collecting, compiling, analyzing, and visualizing grain size distribution data. Data from all path(s) are compiled once into a contiguous samples-by-bins array, from which the dataframes of all methods are produced on demand.
     
     Parameters
     ----------
     path: list
         list of paths
-    lith: string, optional
-        indicator string of lithology; meant for mutliple samples of same lithology
-    area: string, optional
-        indicator string of area, location, or other; meant for multiple samples of same area
+    lith: string or list, optional
+        indicator string of lithology; meant for mutliple samples of same lithology. A list gives the lithology of each path, for grouping samples with groupby.
+    area: string or list, optional
+        indicator string of area, location, or other; meant for multiple samples of same area. A list gives the area of each path, for grouping samples with groupby.
+    meta: dictionary or Dataframe, optional
+        other attributes of samples for grouping with groupby, with one list or column per attribute and values in the same order as path. The default is None.
+    dtype: string or numpy dtype, optional
+        floating point type of compiled data; 'float32' halves memory for very large numbers of samples. The default is 'float64'.
+    memmap: string, optional
+        directory for memory-mapped files of compiled data; used for data larger than memory, as all calculations then run in blocks of samples. The default is None (data compiled in memory).
+    replicates: string or function, optional
+        regular expression or function of file basenames giving the sample name of replicate runs, e.g. r'(.+)_\d+$' for runs 'S123_01' and 'S123_02' of sample 'S123'. The first group of the regular expression, or the whole match if it has no groups, is the sample name; basenames not matching are samples of their own. Replicate runs of each sample are averaged, and all statistics and plots use the averaged samples. The default is None (every file is a sample).
+    layout: string, dictionary, or function, optional
+        layout of samples in files, as read_samples: 'columns' for one sample per column named by the header cell above the data, or 'sheets' for one sample per sheet of a workbook named by sheet name. A dictionary of paths, or a function of path, gives the layout of each file, so that multi-sample workbooks are compiled together with single-sample files (layout None). Attributes of lith, area, and meta given per path apply to all samples of a file. The default is None (every file is a sample, named by file basename).
     
     """
 
-    def __init__(self, path, lith=None, area=None):
+    def __init__(self, path, lith=None, area=None, meta=None, dtype='float64', memmap=None,
+                 replicates=None, layout=None):
         self.path = path
         self.lith = lith
         self.area = area
+        self.meta = meta
+        self.dtype = np.dtype(dtype)
+        self.memmap = memmap
+        self.replicates = replicates
+        self.layout = layout
+        self._select = None
+        self._cache = OrderedDict()
+        self._stcache = OrderedDict()
+
+    def _compiled(self, bin_min=0.375198, rows=93, data_col=1, bin_col=0):
+        """
+        Hidden method to compile grain size data from path(s) into a _Compiled object. If the replicates attribute is given, replicate runs are averaged into one sample. Compiled data are cached and reused until the path attribute, or the size or modification time of any of its files, changes. If the memmap attribute is a directory, data are compiled into a memory-mapped .npy file in that directory, which is reused as long as the path(s) are unchanged.
 
-    def samplenames(self):
+        Parameters
+        ----------
+        bin_min : integer or float, optional
+            value of smallest grain size bin in microns used in analysis. The default is 0.375198.
+        rows : integer, optional
+            number of rows in data path(s) containing data and bin sizes. The default is 93.
+        data_col : integer, optional
+            vertical column number in data path file(s) containing data. The default is 1.
+        bin_col : integer, optional
+            vertical column number in data path file(s) containing bin sizes. The default is 0.
+
+        Returns
+        -------
+        compiled : _Compiled object
+            Compiled grain size data.
+
+        """
+        key = self._key(bin_min, rows, data_col, bin_col)
+
+        # average of replicate runs compiled from data of all runs
+        if self.replicates is not None:
+            rkey = key + (self.replicates,)
+            compiled = self._cached(rkey)
+            if compiled is None:
+                runs = self._runs(key)
+                codes, names = self._replicate_codes(runs.names)
+                compiled = self._store(rkey, runs.collapse(codes, pd.Index(names)))
+            return compiled
+
+        return self._runs(key)
+
+    def _runs(self, key):
+        """Hidden method to compile grain size data of every path for _compiled, one sample per path unless the layout attribute is given, with compile parameters of key."""
+        compiled = self._cached(key)
+        if compiled is not None:
+            return compiled
+        bin_min, rows, data_col, bin_col = key[1:5]
+        if self.layout is not None:
+            return self._runs_layout(key)
+
+        # read files into compiled array
+        values, filename = self._allocate(key)
+        microns = None
+        missing = []
+        for x, path in enumerate(self.path):
+            col, bins = read_sample(path, bin_min, rows, data_col, bin_col)
+            _place(values, x, col, missing)
+            if microns is None:
+                microns = bins
+
+        return self._finish(key, microns, values, missing, filename)
+
+    def _runs_layout(self, key):
+        """Hidden method to compile grain size data of all samples of every path, parsing each file once with read_samples, for _runs."""
+        bin_min, rows, data_col, bin_col = key[1:5]
+        read = [read_samples(path, bin_min, rows, data_col, bin_col, self._layout(path))
+                for path in self.path]
+
+        # samples of all files in order, or samples selected by _subset
+        samples = [(x, y) for x, (names, data, bins) in enumerate(read) for y in range(len(names))]
+        if self._select is not None:
+            pos = {}
+            for x, y in samples:
+                pos.setdefault((self.path[x], read[x][0][y]), (x, y))
+            samples = [pos[s] for s in self._select]
+
+        values, filename = self._allocate(key, len(samples))
+        missing = []
+        for row, (x, y) in enumerate(samples):
+            _place(values, row, read[x][1][y], missing)
+
+        return self._finish(key, read[0][2], values, missing, filename,
+                            [read[x][0][y] for x, y in samples],
+                            [self.path[x] for x, y in samples])
+
+    def _layout(self, path):
+        """Hidden method to collect the layout of samples in path from the layout attribute."""
+        if callable(self.layout):
+            return self.layout(path)
+        if isinstance(self.layout, dict):
+            return self.layout.get(path)
+
+        return self.layout
+
+    @classmethod
+    async def aload(cls, path, concurrency=4, executor=None, bin_min=0.375198,
+                    data_rows=93, data_col=1, bin_col=0, **kwargs):
         '''
-        Collects basenames of path(s), inferred to be sample names.
+        Coroutine to create a GrainSizeDist object and compile its data without blocking an asyncio event loop. Files are parsed in an executor by at most concurrency workers at a time, so that no more files are read than can be processed, and compiled in the same order as samplenames().
+
+        Parameters
+        ----------
+        path : list
+            list of paths
+        concurrency : integer, optional
+            maximum number of files parsed at the same time. The default is 4.
+        executor : concurrent.futures Executor, optional
+            executor used to parse files; a ProcessPoolExecutor parses files in parallel. The default is None (event loop default executor).
+        bin_min : integer or float, optional
+            value of smallest grain size bin in microns used in analysis. The default is 0.375198.
+        data_rows : integer, optional
+            number of rows in data path(s) containing data and bin sizes. The default is 93.
+        data_col : integer, optional
+            vertical column number in data path file(s) containing data. The default is 1.
+        bin_col : integer, optional
+            vertical column number in data path file(s) containing bin sizes. The default is 0.
+        **kwargs
+            other parameters of GrainSizeDist, e.g. lith and area.
 
         Returns
         -------
-        samplenames : list
-            sample names inferred from file basename(s)
+        gsd : GrainSizeDist object
+            Object with data compiled.
 
         '''
+        gsd = cls(path, **kwargs)
+        loop = asyncio.get_running_loop()
+
+        # cache key stats every file, so is collected outside of the event loop
+        key = await loop.run_in_executor(None, gsd._key, bin_min, data_rows, data_col, bin_col)
+        if await loop.run_in_executor(None, gsd._cached, key) is not None:
+            return gsd
+
+        # multi-sample files are parsed in one pass, as sample counts are not known beforehand; compiled in this process to be cached
+        if gsd.layout is not None:
+            await loop.run_in_executor(None, gsd._runs, key)
+            return gsd
+        values, filename = await loop.run_in_executor(None, gsd._allocate, key)
+
+        # workers share one iterator of files, each parsing one file at a time
+        files = iter(enumerate(gsd.path))
+        microns = []
+        missing = []
+
+        async def worker():
+            for x, p in files:
+                col, bins = await loop.run_in_executor(
+                    executor, read_sample, p, bin_min, data_rows, data_col, bin_col)
+                _place(values, x, col, missing)
+                if x == 0:
+                    microns.append(bins)
+
+        await asyncio.gather(*[worker() for x in range(concurrency)])
+        await loop.run_in_executor(None, gsd._finish, key, microns[0], values,
+                                   missing, filename)
+
+        return gsd
+
+    async def adatast(self, prom=0.1, executor=None):
+        '''
+        Coroutine to calculate statistics as datast() without blocking an asyncio event loop.
+
+        Parameters
+        ----------
+        prom : integer or float, optional
+            Peak prominence used for collecting significant modes in multimodal samples. The default is 0.1.
+        executor : concurrent.futures Executor, optional
+            executor used for calculations. The default is None (event loop default executor).
+
+        Returns
+        -------
+        st : Dataframe
+            Dataframe of grain size statistics.
+
+        '''
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(executor, self.datast, prom)
+
+    def _key(self, bin_min, rows, data_col, bin_col):
+        """Hidden method to collect the cache key of data compiled with given parameters from the current path attribute and the current contents of its files."""
+        return (self._source(), bin_min, rows, data_col, bin_col, self.dtype)
+
+    def _source(self):
+        """Hidden method to collect the part of cache keys identifying source data: path(s) with the size and modification time of each file, so that files changed on disk are compiled again, and layout and selected samples if the layout attribute is given."""
+        stamps = tuple((st.st_size, st.st_mtime_ns) for st in map(os.stat, self.path))
+        if self.layout is None:
+            return (tuple(self.path), stamps)
+
+        return (tuple(self.path), stamps, tuple(self._layout(p) for p in self.path), self._select)
+
+    def _cached(self, key):
+        """Hidden method to collect compiled data of key from cache or from a saved memory-mapped file; returns None if not yet compiled."""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if self.memmap is not None:
+            compiled = _load_compiled(self._memmap_name(key))
+            if compiled is not None:
+                return self._store(key, compiled)
+
+        return None
+
+    def _allocate(self, key, samples=None):
+        """Hidden method to create the samples-by-bins array compiled for key, with one sample per path unless number of samples is given, in memory or as a memory-mapped file; returns array and its file name (None in memory)."""
+        shape = (len(self.path) if samples is None else samples, key[2])
+        if self.memmap is None:
+            return np.empty(shape, dtype=self.dtype), None
+
+        filename = self._memmap_name(key)
+        values = np.lib.format.open_memmap(filename + '.tmp', mode='w+',
+                                           dtype=self.dtype, shape=shape)
+
+        return values, filename
+
+    def _finish(self, key, microns, values, missing, filename, names=None, sources=None):
+        """Hidden method to cache a filled array from _allocate as compiled data of key; sample names and source paths are basenames and path(s) unless given."""
+        names = pd.Index(self._basenames() if names is None else names)
+        sources = self.path if sources is None else sources
+        missing = np.array(sorted(missing), dtype=int).reshape(-1, 2)
+
+        if filename is not None:
+            # close memory-mapped file, then reopen read-only
+            values.flush()
+            del values
+            _save_compiled(filename, microns, names, sources, missing)
+            return self._store(key, _load_compiled(filename))
+
+        compiled = _Compiled(microns, values, names,
+                             np.array(sources, dtype=object), missing)
+
+        return self._store(key, compiled)
+
+    def _store(self, key, compiled):
+        """Hidden method to cache compiled data under key, discarding the least recently used data beyond _CACHE_SIZE entries."""
+        self._cache[key] = compiled
+        while len(self._cache) > _CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+        return compiled
+
+    def _memmap_name(self, key):
+        """Hidden method to name the memory-mapped file of compiled data from its cache key, by digests of path(s) and parameters, then of the size and modification time of all path(s), so that files superseded by changes on disk share the first digest."""
+        source = key[0]
+        fixed = hashlib.sha1(repr((source[0],) + source[2:] + key[1:]).encode()).hexdigest()[:16]
+        stamps = hashlib.sha1(repr(source[1]).encode()).hexdigest()[:16]
+
+        return os.path.join(self.memmap, 'grainpy_' + fixed + '_' + stamps + '.npy')
+
+    def _basenames(self):
+        """Hidden method to collect basenames of path(s) without extensions."""
         samplenames = []
         for path in self.path:
             data_basename = os.path.basename(path)
@@ -62,6 +955,199 @@ class GrainSizeDist():
 
         return samplenames
 
+    def _replicate_codes(self, runs=None):
+        """Hidden method to collect the integer sample of each run (path, or sample of a multi-sample file) from the replicates attribute, and sample names in order of first run."""
+        if runs is None:
+            runs = self._basenames() if self.layout is None else \
+                self._runs(self._key(*_COMPILE)).names
+        labels = []
+        for name in runs:
+            if callable(self.replicates):
+                labels.append(str(self.replicates(name)))
+                continue
+            match = re.match(self.replicates, name)
+            if match is None:
+                labels.append(name)
+            else:
+                labels.append(match.group(1) if match.groups() else match.group(0))
+        codes, names = pd.factorize(pd.Series(labels, dtype=object), sort=False)
+
+        return codes, list(names)
+
+    def samplenames(self):
+        '''
+        Collects basenames of path(s), inferred to be sample names. If the layout attribute is given, samples of multi-sample files are named by header cells or sheet names. If the replicates attribute is given, replicate runs are one sample.
+
+        Returns
+        -------
+        samplenames : list
+            sample names inferred from file basename(s)
+
+        '''
+        if self.replicates is not None:
+            return self._replicate_codes()[1]
+        if self.layout is not None:
+            return list(self._compiled().names)
+
+        return self._basenames()
+
+    def metadata(self):
+        '''
+        Collects attributes of all samples from lith, area, and meta attributes. String lith or area attributes apply to all samples.
+
+        Returns
+        -------
+        meta : Dataframe
+            Dataframe of attributes, with samples as rows.
+
+        '''
+        compiled = self._compiled()
+        meta = self._pathmeta()
+
+        # attributes of each sample from its source path
+        pos = {}
+        for x, path in enumerate(self.path):
+            pos.setdefault(path, x)
+        meta = meta.reindex([pos[path] for path in compiled.sources])
+        meta.index = compiled.names
+
+        return meta
+
+    def _pathmeta(self):
+        """Hidden method to collect attributes of each path from lith, area, and meta attributes."""
+        meta = pd.DataFrame(index=range(len(self.path)))
+        if self.meta is not None:
+            meta = meta.join(pd.DataFrame(self.meta).reset_index(drop=True))
+        for attr in ('lith', 'area'):
+            value = getattr(self, attr)
+            if value is not None:
+                meta[attr] = value if type(value) == str else list(value)
+
+        return meta
+
+    def _subset(self, rows, lith=None, area=None):
+        '''
+        Hidden method to create a GrainSizeDist object of selected samples, sharing data already compiled so that no files are read again.
+
+        Parameters
+        ----------
+        rows : list or numpy array
+            integer positions of selected samples
+        lith : string, optional
+            lith attribute of new object. The default is None.
+        area : string, optional
+            area attribute of new object. The default is None.
+
+        Returns
+        -------
+        sub : GrainSizeDist object
+            Object of selected samples.
+
+        '''
+        compiled = self._compiled()
+
+        # all replicate runs of selected samples
+        if self.replicates is not None:
+            rows = np.sort(rows)
+            runs = np.flatnonzero(np.isin(self._replicate_codes()[0], rows))
+        else:
+            runs = rows
+
+        # source path of each run, or files of selected runs once each, with runs selected by file and sample name
+        select = None
+        if self.layout is None and self.replicates is not None:
+            path = [self.path[r] for r in runs]
+            meta = self._pathmeta().iloc[runs].reset_index(drop=True)
+        elif self.layout is None:
+            path = list(compiled.sources[rows])
+            meta = self.metadata().iloc[rows].reset_index(drop=True)
+        else:
+            full = self._runs(self._key(*_COMPILE))
+            select = tuple(zip(full.sources[runs], full.names[runs]))
+            path = list(dict.fromkeys(full.sources[runs]))
+            pos = {}
+            for x, p in enumerate(self.path):
+                pos.setdefault(p, x)
+            meta = self._pathmeta().iloc[[pos[p] for p in path]].reset_index(drop=True)
+
+        meta = meta.drop(columns=[a for a, v in (('lith', lith), ('area', area))
+                                  if v is not None and a in meta])
+        sub = GrainSizeDist(path, lith=lith, area=area, meta=meta, dtype=self.dtype,
+                            memmap=self.memmap, replicates=self.replicates, layout=self.layout)
+        sub._select = select
+
+        # share data of runs, and of averaged replicates
+        source = self._source()
+        for key, compiled in list(self._cache.items()):
+            if key[0] != source:
+                continue
+            if len(key) == 6:
+                sub._store((sub._source(),) + key[1:], compiled.take(runs))
+            elif key[6] == self.replicates:
+                sub._store((sub._source(),) + key[1:], compiled.take(rows))
+
+        return sub
+
+    def groupby(self, by):
+        '''
+        Groups samples by one or more attributes of metadata(), e.g. 'lith' and/or 'area'. Means, standard errors, confidence intervals, and statistics of all groups are calculated together from data compiled once.
+
+        Parameters
+        ----------
+        by : string or list
+            attribute(s) used to group samples.
+
+        Returns
+        -------
+        groups : GrainSizeGroups object
+            Groups of samples.
+
+        '''
+        return GrainSizeGroups(self, by)
+
+    def replicate_spread(self, prom=0.1, bin_min=0.375198, data_rows=93, data_col=1):
+        '''
+        Calculates the spread of replicate runs of each sample given by the replicates attribute, as standard deviations of the runs per bin and per statistic.
+
+        Parameters
+        ----------
+        prom : integer or float, optional
+            Peak prominence used for collecting significant modes in multimodal samples. The default is 0.1.
+        bin_min : integer or float, optional
+            value of smallest grain size bin in microns used in analysis. The default is 0.375198.
+        data_rows : integer, optional
+            number of rows in data path(s) containing data and bin sizes. The default is 93.
+        data_col : integer, optional
+            vertical column number in data path file(s) containing data. The default is 1.
+
+        Returns
+        -------
+        bins_sd : Dataframe
+            Dataframe of standard deviations of runs per bin, with samples as columns as data().
+        stats_sd : Dataframe
+            Dataframe of number of runs ('n') and standard deviations of runs of numeric statistics of datast(), with samples as rows.
+
+        '''
+        if self.replicates is None:
+            raise ValueError('replicates attribute is not given')
+
+        runs = self._runs(self._key(bin_min, data_rows, data_col, 0))
+        codes, names = self._replicate_codes(runs.names)
+        phi = runs.phi()
+
+        # spread per bin, from standard errors of the means of runs
+        n, mean, sem = runs.groupmeansem(codes, len(names))
+        bins_sd = pd.DataFrame((sem * np.sqrt(n)[:, np.newaxis]).T, columns=names)
+
+        # spread per statistic of runs
+        st = _concat_stats([_stats(block, phi, prom) for start, block in runs.blocks()])
+        st.pop('modes')
+        stats_sd = pd.DataFrame(st).groupby(codes).std()
+        stats_sd.index = pd.Index(names)
+        stats_sd.insert(0, 'n', n)
+
+        return bins_sd, stats_sd
+
     def bins(self, bin_min=0.375198, bin_rows=93, bin_col=0):
         '''
         Collects bins from first path only. Assumes bins represent lower channel thresholds, and in microns.
@@ -81,29 +1167,47 @@ class GrainSizeDist():
             Dataframe of bins used in grain size analysis in microns, millimeters, and phi units.
 
         '''
+        # use bins of compiled data if available, otherwise read first file only
+        microns = None
+        source = self._source()
+        for key, compiled in self._cache.items():
+            if key[:3] == (source, bin_min, bin_rows) and key[4] == bin_col:
+                microns = compiled.microns
+                break
+        if microns is None:
+            microns = read_sample(self.path[0], bin_min, bin_rows, bin_col, bin_col)[1]
+
         bins = pd.DataFrame(columns=['phi', 'mm', 'microns'])
-        x = 0
+        bins['microns'] = microns
+        bins['mm'] = bins['microns'] / 1000
+        bins['phi'] = -1 * np.log2(bins['mm'])
 
-        # extract grain size bins from first file only
-        for path in self.path:
-            while x == 0:
-                file = pd.read_excel(path, header=None)
-                i, c = np.where(file == bin_min)
+        return bins
 
-                bins['microns'] = file.iloc[i[0]:i[0] +
-                                            bin_rows, bin_col].astype(float)
-                bins['mm'] = bins['microns'] / 1000
-                bins['phi'] = -1 * np.log2(bins['mm'])
+    def datamatrix(self, bin_min=0.375198, data_rows=93, data_col=1):
+        '''
+        Collects grain size data from path(s) as a read-only samples-by-bins array, without the mean of all samples. Rows are ordered as samplenames(), and bins from coarse to fine as bins().
 
-                x += 1
+        Parameters
+        ----------
+        bin_min : integer or float, optional
+            value of smallest grain size bin in microns used in analysis. The default is 0.375198.
+        data_rows : integer, optional
+            number of rows in data path(s) containing data and bin sizes. The default is 93.
+        data_col : integer, optional
+            vertical column number in data path file(s) containing data. The default is 1.
 
-        bins = bins.iloc[::-1].reset_index(drop=True)
+        Returns
+        -------
+        values : numpy array
+            Array of grain size analysis data from class path file(s)
 
-        return bins
+        '''
+        return self._compiled(bin_min, data_rows, data_col).values
 
     def data(self, bin_min=0.375198, data_rows=93, data_col=1):
         '''
-        Collects grain size data from path(s).
+        Collects grain size data from path(s), as a new dataframe copied from the compiled data; datamatrix() returns the compiled data without copying.
 
         Parameters
         ----------
@@ -120,23 +1224,14 @@ class GrainSizeDist():
             Dataframe of grain size analysis data from class path file(s)
 
         '''
-        names = self.samplenames()
-        data = pd.DataFrame()
+        compiled = self._compiled(bin_min, data_rows, data_col)
 
-        # read files
-        x = 0
-        for path in self.path:
-            file = pd.read_excel(path, header=None)
-            i, c = np.where(file == bin_min)
-            data[names[x]] = file.iloc[i[0]:i[0] +
-                                       data_rows, data_col].astype(float)
-            x += 1
+        # transposed copy of compiled array, samples as columns
+        data = pd.DataFrame(compiled.values.T,
+                            columns=compiled.names, copy=True)
 
         # add new column of mean values
-        data['mean'] = data.mean(axis=1)
-
-        # reorganize for standard grain size distribution plots
-        data = data.iloc[::-1].reset_index(drop=True).replace(np.nan, 0)
+        data['mean'] = compiled.mean()
 
         return data
 
@@ -151,18 +1246,34 @@ class GrainSizeDist():
 
         '''
 
-        cp = self.data().cumsum()
+        compiled = self._compiled()
+
+        # copy of cumulative sums of compiled data, samples as columns
+        cp = pd.DataFrame(compiled.cumulative().T,
+                          columns=compiled.names, copy=True)
+        cp['mean'] = compiled.mean().cumsum()
 
         return cp
 
-    def datast(self, prom=0.1):
+    def datast(self, prom=0.1, bin_min=0.375198, data_rows=93, data_col=1, typed=False,
+               interp='linear'):
         '''
-        Calculates statistics for grain size data from class path file(s)
+        Calculates statistics for grain size data from class path file(s). Results are kept for the last few combinations of parameters, and calculated again if path(s), or the size or modification time of their files, change. By default, statistics are returned with samples as columns of mixed values and classes (object dtype); with typed, samples are rows, statistics are float64 columns, and classes are categorical columns.
 
         Parameters
         ----------
         prom : integer or float, optional
             Peak prominence used for collecting significant modes in multimodal samples. The default is 0.1.
+        bin_min : integer or float, optional
+            value of smallest grain size bin in microns used in analysis. The default is 0.375198.
+        data_rows : integer, optional
+            number of rows in data path(s) containing data and bin sizes. The default is 93.
+        data_col : integer, optional
+            vertical column number in data path file(s) containing data. The default is 1.
+        typed : Bool, optional
+            Option to return statistics with samples as rows, float64 statistics, and categorical classes, without the formatted 'silt+clay' statistic. The default is False.
+        interp : string, optional
+            interpolation of cumulative percentages between bins: 'linear', or 'pchip' for monotone cubic curves, fitted once for all samples, which are more accurate for well sorted samples spanning few bins. The default is 'linear'.
 
         Returns
         -------
@@ -170,116 +1281,484 @@ class GrainSizeDist():
             Dataframe of grain size statistics.
 
         '''
-        data = self.data()
-        cp = self.datacp()
-        phi = self.bins()['phi']
-        st = pd.DataFrame(columns=data.columns)
-
-        # stats derived from grain size data
-        max_list = []
-        min_list = []
-        mode_list = []
-        for column, contents in data.iteritems():
-            idx = contents[contents > 0].index
-
-            max_ = phi[idx[0]]
-            max_list.append(max_)
-
-            min_ = phi[idx[-1]]
-            min_list.append(min_)
-
-            peak_idx = find_peaks(contents, prominence=prom)
-            mode_val = contents[peak_idx[0]]
-            mode_phi = phi[peak_idx[0]]
-            mode_sort = [y for x, y in sorted(zip(mode_val, mode_phi))]
-            mode_sort = mode_sort[::-1]
-            mode_list.append(mode_sort)
-
-        # stats derived from cumulative percentage data
-        mean_list = []
-        median_list = []
-        sort_list = []
-        skew_list = []
-        kurt_list = []
-        s_list = []
-        m_list = []
-        c_list = []
-        for column, contents in cp.iteritems():
-            phi5 = np.interp(5, contents, phi)
-            phi16 = np.interp(16, contents, phi)
-            phi25 = np.interp(25, contents, phi)
-            phi50 = np.interp(50, contents, phi)
-            phi75 = np.interp(75, contents, phi)
-            phi84 = np.interp(84, contents, phi)
-            phi95 = np.interp(95, contents, phi)
-
-            median = phi50
-            median_list.append(median)
-
-            mean = (phi16 + phi50 + phi84) / 3
-            mean_list.append(mean)
-
-            sort = ((phi84 - phi16) / 4) + ((phi95 - phi5) / 6.6)
-            sort_list.append(sort)
-
-            skew = ((phi16 + phi84 - (2*phi50)) / (2 * (phi84 - phi16))
-                    ) + ((phi5 + phi95 - (2*phi50)) / (2 * (phi95 - phi5)))
-            skew_list.append(skew)
-
-            kurt = (phi95 - phi5) / (2.44 * (phi75 - phi25))
-            kurt_list.append(kurt)
-
-            s = np.interp(4, phi, contents)
-            s_list.append(s)
-
-            m = np.interp(8, phi, contents) - s
-            m_list.append(m)
-
-            c = 100 - (m + s)
-            c_list.append(c)
-
-        # add rows in st dataframe for all stats and qualitative descriptions
-        st.loc['sand'] = s_list
-        st.loc['silt'] = m_list
-        st.loc['clay'] = c_list
-        st.loc['silt+clay'] = [str(round(x)) + '+' + str(round(y))
-                               for x, y in zip(m_list, c_list)]
-        st.loc['sediment_class'] = [
-            folk_sed(x, y, z) for x, y, z in zip(s_list, m_list, c_list)]
-        st.loc['max'] = max_list
-        st.loc['max_ww'] = [wentworth_gs(i) for i in max_list]
-        st.loc['min'] = min_list
-        st.loc['min_ww'] = [wentworth_gs(i) for i in min_list]
-        st.loc['median'] = median_list
-        st.loc['median_ww'] = [wentworth_gs(i) for i in median_list]
-        st.loc['mean_folk'] = mean_list
-        st.loc['mean_folk_ww'] = [wentworth_gs(i) for i in mean_list]
-        st.loc['sorting_folk'] = sort_list
-        st.loc['sorting_folk_class'] = [folk_sort(i) for i in sort_list]
-        st.loc['skewness_folk'] = skew_list
-        st.loc['skewness_folk_class'] = [folk_skew(i) for i in skew_list]
-        st.loc['kurtosis_folk'] = kurt_list
-        st.loc['kurtosis_folk_class'] = [folk_kurt(i) for i in kurt_list]
-
-        # make all mode lists same length then add mode rows in st dataframe
-        mode_num = len(max(mode_list, key=len))
-        for modes in mode_list:
-            while len(modes) < mode_num:
-                modes.append(np.nan)
+        if interp not in ('linear', 'pchip'):
+            raise ValueError("interp must be 'linear' or 'pchip'")
+
+        # statistics are kept under the same key as compiled data, including size and
+        # modification time of files, so that changed files are never reused
+        key = (self._key(bin_min, data_rows, data_col, 0), self.replicates, prom, typed, interp)
+        if key in self._stcache:
+            self._stcache.move_to_end(key)
+            return self._stcache[key].copy()
+
+        compiled = self._compiled(bin_min, data_rows, data_col)
+
+        phi = compiled.phi()
+
+        # calculate in blocks of samples, then mean of all samples; PCHIP curves are fitted per block
+        if interp == 'pchip':
+            mean = compiled.mean()[np.newaxis]
+            st = [_stats(block, phi, prom, _pchip_slopes(block.cumsum(axis=1), phi))
+                  for start, block in compiled.blocks()]
+            st.append(_stats(mean, phi, prom, _pchip_slopes(mean.cumsum(axis=1), phi)))
+        else:
+            st = [_stats(block, phi, prom) for start, block in compiled.blocks()]
+            st.append(_stats(compiled.mean()[np.newaxis], phi, prom))
+        if typed:
+            st = _stats_table(_concat_stats(st), pd.Index(list(compiled.names) + ['mean']))
+        else:
+            st = _stats_frame(_concat_stats(st), list(compiled.names) + ['mean'])
 
-        x = 1
-        while x <= mode_num:
-            mode_label = 'mode' + str(x)
-            st.loc[mode_label] = [modes[x-1] for modes in mode_list]
-            st.loc[mode_label +
-                   '_ww'] = [wentworth_gs(modes[x-1]) for modes in mode_list]
-            x += 1
+        self._stcache[key] = st
+        self._stcache.move_to_end(key)
+        while len(self._stcache) > _STATS_SIZE:
+            self._stcache.popitem(last=False)
+
+        return st.copy()
+
+    def dataqc(self, tol=1.0, tail=0.1):
+        '''
+        Checks compiled data of all samples for problems that corrupt statistics: totals different from 100%, negative values, values missing in source files (compiled as 0), distributions truncated by the coarsest or finest bin, and duplicate sample names.
+
+        Parameters
+        ----------
+        tol : integer or float, optional
+            largest accepted difference of sample totals from 100%. The default is 1.0.
+        tail : integer or float, optional
+            largest accepted volume (%) in the coarsest or finest bin; samples with more run past the range of bins, so that percentiles such as phi5 and phi95 are clipped. The default is 0.1.
+
+        Returns
+        -------
+        qc : Dataframe
+            Dataframe of sample totals, source paths, and flags of each check, with samples as rows. The 'flagged' column is True for samples failing any check.
+
+        '''
+        compiled = self._compiled()
+        n = len(compiled.values)
+
+        # totals, negative values, and volume in coarsest and finest bins, block-wise
+        total = np.empty(n)
+        negative = np.empty(n, dtype=bool)
+        truncated = np.empty(n, dtype=bool)
+        for start, block in compiled.blocks():
+            total[start:start + len(block)] = block.sum(axis=1)
+            negative[start:start + len(block)] = (block < 0).any(axis=1)
+            truncated[start:start + len(block)] = (block[:, 0] > tail) | (block[:, -1] > tail)
+
+        missing = np.bincount(compiled.missing[:, 0], minlength=n) > 0
+
+        qc = pd.DataFrame({'source': compiled.sources, 'total': total,
+                           'total_off': np.abs(total - 100) > tol,
+                           'negative': negative, 'missing': missing,
+                           'truncated': truncated,
+                           'duplicate': compiled.names.duplicated(keep=False)},
+                          index=compiled.names)
+        qc['flagged'] = qc.iloc[:, 2:].any(axis=1)
+
+        return qc
+
+    def passed(self, tol=1.0, tail=0.1):
+        '''
+        Collects samples passing all checks of dataqc() as a new GrainSizeDist object, sharing data already compiled, e.g. to calculate datast() without flagged samples.
+
+        Parameters
+        ----------
+        tol : integer or float, optional
+            largest accepted difference of sample totals from 100%. The default is 1.0.
+        tail : integer or float, optional
+            largest accepted volume (%) in the coarsest or finest bin, as dataqc(). The default is 0.1.
+
+        Returns
+        -------
+        gsd : GrainSizeDist object
+            Object of samples passing all checks.
+
+        '''
+        rows = np.flatnonzero(~self.dataqc(tol, tail)['flagged'].to_numpy())
+
+        return self._subset(rows, lith=self.lith if type(self.lith) == str else None,
+                            area=self.area if type(self.area) == str else None)
+
+    def anomalies(self, q=_FOLK_PERCENTILES, alpha=0.001):
+        '''
+        Scores how unusual each sample is compared to all samples, e.g. to find runs spoiled by bubbles, contamination, or mislabelled files, as robust Mahalanobis distances of percentile vectors. Location and scatter of percentiles are taken from the most consistent half of samples, so that unusual samples do not mask each other.
+
+        Parameters
+        ----------
+        q : list, optional
+            cumulative percentages of percentile vectors, as percentiles(). The default is (5, 16, 25, 50, 75, 84, 95).
+        alpha : float, optional
+            significance level of flagged samples, from the chi-squared distribution of squared distances expected of normal data; percentiles of real samples are rarely normal, so scores and ranks are more reliable than p-values. The default is 0.001.
+
+        Returns
+        -------
+        scores : Dataframe
+            Dataframe of robust distance ('score'), p-value, rank (1 for the most unusual sample), and flag of each sample, with samples as rows ranked by decreasing score. The 'flagged' column is True for samples with p-values below alpha.
+
+        '''
+        d2, p_value = self._anomaly_scores(q)
+        scores = pd.DataFrame({'score': np.sqrt(d2), 'p_value': p_value,
+                               'rank': scipy.stats.rankdata(-d2, method='min').astype(int),
+                               'flagged': p_value < alpha},
+                              index=self._compiled().names)
+
+        return scores.iloc[np.argsort(-d2, kind='stable')]
+
+    def _anomaly_scores(self, q):
+        """Hidden method to calculate squared robust distances of percentile vectors of all samples and their p-values, in order of samples."""
+        X = self.percentiles(q).iloc[:-1].to_numpy()
+        n, p = X.shape
+        if n <= p + 1:
+            raise ValueError('anomalies requires more samples than percentiles plus one')
+        d2 = _robust_distance(X)
+
+        return d2, scipy.stats.chi2.sf(d2, p)
+
+    def inliers(self, q=_FOLK_PERCENTILES, alpha=0.001):
+        '''
+        Collects samples not flagged by anomalies() as a new GrainSizeDist object, sharing data already compiled, e.g. to calculate gsd_multi() mean curves or groupby() means and confidence intervals without unusual samples.
+
+        Parameters
+        ----------
+        q : list, optional
+            cumulative percentages of percentile vectors, as anomalies(). The default is (5, 16, 25, 50, 75, 84, 95).
+        alpha : float, optional
+            significance level of flagged samples, as anomalies(). The default is 0.001.
+
+        Returns
+        -------
+        gsd : GrainSizeDist object
+            Object of samples not flagged.
+
+        '''
+        rows = np.flatnonzero(self._anomaly_scores(q)[1] >= alpha)
+
+        return self._subset(rows, lith=self.lith if type(self.lith) == str else None,
+                            area=self.area if type(self.area) == str else None)
+
+    def percentiles(self, q=_FOLK_PERCENTILES, units='phi', finer=False, interp='linear'):
+        '''
+        Calculates grain sizes at cumulative percentages q of all samples and their mean, by interpolating cumulative percentages of all samples in blocks. The default percentages are those used for Folk and Ward (1957) statistics in datast().
+
+        Parameters
+        ----------
+        q : list, optional
+            cumulative percentages. The default is (5, 16, 25, 50, 75, 84, 95).
+        units : string, optional
+            units of grain sizes: 'phi', 'mm', or 'microns'. The default is 'phi'.
+        finer : Bool, optional
+            Option to take percentages as percent finer, as engineering D-values (e.g. D10 is the grain size that 10% of the sample is finer than). The default is False (percent coarser, as phi percentiles of Folk and Ward, 1957).
+        interp : string, optional
+            interpolation of cumulative percentages between bins: 'linear' or 'pchip', as datast(). The default is 'linear'.
+
+        Returns
+        -------
+        pct : Dataframe
+            Dataframe of grain sizes, with samples as rows and percentages as columns.
+
+        '''
+        if units not in ('phi', 'mm', 'microns'):
+            raise ValueError("units must be 'phi', 'mm', or 'microns'")
+        if interp not in ('linear', 'pchip'):
+            raise ValueError("interp must be 'linear' or 'pchip'")
+
+        compiled = self._compiled()
+        phi = compiled.phi()
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        qc = 100 - q if finer else q
+
+        # interpolate in blocks of samples, then mean of all samples; PCHIP curves are fitted per block
+        mean = compiled.mean().cumsum()[np.newaxis]
+        if interp == 'pchip':
+            pct = [_pchip_cp(qc, cp, phi, _pchip_slopes(cp, phi))
+                   for start, cp in compiled.blocks(cumulative=True)]
+            pct.append(_pchip_cp(qc, mean, phi, _pchip_slopes(mean, phi)))
+        else:
+            pct = [_interp_cp(qc, cp, phi) for start, cp in compiled.blocks(cumulative=True)]
+            pct.append(_interp_cp(qc, mean, phi))
+        pct = np.vstack(pct)
+
+        if units == 'mm':
+            pct = 2 ** -pct
+        elif units == 'microns':
+            pct = 1000 * 2 ** -pct
+
+        return pd.DataFrame(pct, index=list(compiled.names) + ['mean'],
+                            columns=pd.Index([x if x % 1 else int(x) for x in q],
+                                             name='percentile'))
+
+    def uniformity(self):
+        '''
+        Calculates engineering grain size parameters of all samples and their mean: D10, D30, D50, D60, and D90 in mm (percent finer), coefficient of uniformity (Cu = D60 / D10), and coefficient of curvature (Cc = D30^2 / (D10 * D60)).
+
+        Returns
+        -------
+        uni : Dataframe
+            Dataframe of grain size parameters, with samples as rows.
+
+        '''
+        d = self.percentiles((10, 30, 50, 60, 90), units='mm', finer=True)
+        uni = d.rename(columns=lambda x: 'D' + str(x))
+        uni.columns.name = None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            uni['Cu'] = uni['D60'] / uni['D10']
+            uni['Cc'] = uni['D30'] ** 2 / (uni['D10'] * uni['D60'])
+
+        return uni
+
+    def _depths(self, depth):
+        """Hidden method to collect depth of each sample from a metadata() attribute name or a list of depths."""
+        if type(depth) == str:
+            return self.metadata()[depth].to_numpy(dtype=float)
+        depth = np.asarray(depth, dtype=float)
+        if len(depth) != len(self._compiled().values):
+            raise ValueError('depth must have one value for each sample')
+
+        return depth
+
+    def profile(self, depth='depth', window=5):
+        '''
+        Calculates statistics of samples ordered by depth (or any other ordering attribute), over rolling windows of samples. The grain size distributions of the samples in each window are averaged, and statistics of windows are calculated together in blocks, from cumulative sums of the ordered samples each block of windows spans. Samples without depth are left out.
+
+        Parameters
+        ----------
+        depth : string or list, optional
+            attribute of metadata() giving the depth of each sample, or list of depths in the same order as samplenames(). The default is 'depth'.
+        window : integer or float, optional
+            number of samples in each window (integer), centred on each sample; or depth interval of each window (float), centred on the depth of each sample. The default is 5 (1 gives statistics of each sample).
+
+        Returns
+        -------
+        prof : Dataframe
+            Dataframe of depth, sample name, number of samples in window ('n'), sand, silt, and clay percentages, Folk and Ward (1957) statistics, and phi at cumulative percentages 5, 16, 25, 50, 75, 84, and 95, with windows as rows ordered by depth.
+
+        '''
+        compiled = self._compiled()
+        phi = compiled.phi()
+        depth = self._depths(depth)
+
+        # order samples by depth
+        order = np.flatnonzero(~np.isnan(depth))
+        order = order[np.argsort(depth[order], kind='stable')]
+        z = depth[order]
+
+        # first and last (exclusive) ordered sample of each window, both increasing
+        if isinstance(window, (int, np.integer)):
+            start = np.arange(len(z)) - (window - 1) // 2
+            end = np.clip(start + window, 0, len(z))
+            start = np.clip(start, 0, len(z))
+        else:
+            start = np.searchsorted(z, z - window / 2, side='left')
+            end = np.searchsorted(z, z + window / 2, side='right')
+
+        n = end - start
+
+        # mean cumulative percentages of each block of windows from running sums of the samples they span
+        pct, ssc = [np.empty((0, len(_FOLK_PERCENTILES)))], [np.empty((0, 3))]
+        for a in range(0, len(z), _BLOCK_ROWS):
+            lo, hi = start[a:a + _BLOCK_ROWS], end[a:a + _BLOCK_ROWS]
+            cp = np.asarray(compiled.values[order[lo[0]:hi[-1]]], dtype=float).cumsum(axis=1)
+            total = np.vstack([np.zeros((1, cp.shape[1])), cp.cumsum(axis=0)])
+            cp = (total[hi - lo[0]] - total[lo - lo[0]]) / (hi - lo)[:, np.newaxis]
+            pct.append(_interp_cp(_FOLK_PERCENTILES, cp, phi))
+            ssc.append(np.column_stack(_ssc(cp, phi)))
+        pct = np.vstack(pct)
+        mean, sort, skew, kurt = _folk(pct)
+        s, m, c = np.vstack(ssc).T
+
+        prof = pd.DataFrame({'depth': z, 'sample': compiled.names[order], 'n': n,
+                             'sand': s, 'silt': m, 'clay': c, 'mean_folk': mean,
+                             'sorting_folk': sort, 'skewness_folk': skew,
+                             'kurtosis_folk': kurt})
+        for x, q in enumerate(_FOLK_PERCENTILES):
+            prof['phi' + str(q)] = pct[:, x]
+
+        return prof
+
+    def _profile_plot(self, depth='depth', window=5, pyplot=False):
+        """
+        Hidden method to plot the downhole profile of samples for gsd_profile, with parameters as gsd_profile; with pyplot, on a pyplot figure to be shown.
+
+        Returns
+        -------
+        fig : Matplotlib Figure instance
+            Downhole profile plot.
+
+        """
+        raw = self.profile(depth, 1)
+        prof = self.profile(depth, window) if window != 1 else raw
+        z = prof['depth'].to_numpy()
+
+        fig = _figure((10, 10), pyplot=pyplot)
+        ax1, ax2, ax3 = fig.subplots(1, 3, sharey=True, gridspec_kw={'wspace': 0.08})
+        ax1.set_ylim(z.max(), z.min()) if len(z) > 1 else ax1.invert_yaxis()
+        ax1.set_ylabel('Depth', size=12, style='italic')
+
+        # sand, silt, and clay of windows as stacked areas
+        sand = prof['sand'].to_numpy()
+        mud = sand + prof['silt'].to_numpy()
+        ax1.fill_betweenx(z, 0, sand, color='#FFD82F', lw=0, label='sand')
+        ax1.fill_betweenx(z, sand, mud, color='#66B2FF', lw=0, label='silt')
+        ax1.fill_betweenx(z, mud, 100, color='#6B8E23', alpha=0.5, lw=0, label='clay')
+        ax1.set_xlim(0, 100)
+        ax1.set_xlabel('Proportion (%)', size=12, style='italic')
+        ax1.legend(loc='lower center', bbox_to_anchor=(0.5, 1.0), ncol=3, frameon=False)
+
+        # samples as rasterized points, windows as lines
+        ax2.scatter(raw['mean_folk'], raw['depth'], s=2, color='0.6', lw=0, rasterized=True)
+        ax2.plot(prof['mean_folk'], z, color='#AB2328', lw=1.5, label='mean')
+        ax2.fill_betweenx(z, prof['phi16'], prof['phi84'], color='#AB2328', alpha=0.2, lw=0,
+                          label='\u03C616-\u03C684')
+        ax2.set_xlim(-1, 12)
+        ax2.set_xlabel('Grain diameter (\u03C6)', size=12, style='italic')
+        ax2.legend(loc='lower center', bbox_to_anchor=(0.5, 1.0), ncol=2, frameon=False)
+
+        ax3.scatter(raw['sorting_folk'], raw['depth'], s=2, color='0.6', lw=0, rasterized=True)
+        ax3.plot(prof['sorting_folk'], z, color='k', lw=1.5)
+        ax3.set_xlabel('Sorting (\u03C6)', size=12, style='italic')
+
+        for ax in (ax1, ax2, ax3):
+            ax.tick_params(width=0.5, labelsize=10)
+
+        title = self._names('Downhole Profile', 'Profile')[0]
+        fig.suptitle(title, size=18, weight='bold', style='italic')
+
+        return fig
+
+    def gsd_profile(self, depth='depth', window=5, save=True, fmt=None, show=None):
+        '''
+        Method to plot a downhole profile of samples ordered by depth: sand, silt, and clay proportions, mean grain size with phi16 to phi84 range, and sorting, over rolling windows as profile(), with statistics of each sample as points. Plot is saved in jpeg and PDF formats in the directory where data files are located.
+
+        Parameters
+        ----------
+        depth : string or list, optional
+            attribute of metadata() giving the depth of each sample, or list of depths in the same order as samplenames(). The default is 'depth'.
+        window : integer or float, optional
+            number of samples (integer) or depth interval (float) of rolling windows, as profile(). The default is 5.
+        save : Bool, optional
+            Option to save plot files. The default is True.
+        fmt : string, optional
+            image format of returned plot, e.g. 'png'. The default is None (Matplotlib Figure returned).
+        show : Bool, optional
+            Option to show the plot with pyplot. The default is None (shown if Matplotlib uses an interactive backend, e.g. a window or notebook).
+
+        Returns
+        -------
+        fig : Figure or bytes
+            the plot as a Matplotlib Figure, or bytes of format fmt.
+
+        '''
+        path = self.path[0]
+        file = self._names('Downhole Profile', 'Profile')[1]
+        show = _showing(show)
+        fig = self._profile_plot(depth, window, show)
+
+        # save figure in sample file directory
+        filesave = path.replace(os.path.basename(path), file)
+
+        return self._output(fig, filesave, save, fmt, show)
+
+    def _gems_blocks(self):
+        """
+        Hidden method to collect the table exported by util.gems_ex in blocks of samples, so that tables larger than memory can be written block-wise.
+
+        Yields
+        ------
+        df : Dataframe
+            Compiled data and sand/silt/clay relative proportions of a block of samples, with samples as rows.
+
+        """
+        compiled = self._compiled()
+        phi = compiled.phi()
+
+        # format bin titles
+        cols = ['Lower' + str(i).replace('.', 'p') for i in compiled.microns[1:]]
+        cols[0] = 'Upper2000' + cols[0]
+
+        for start, block in compiled.blocks():
+            cp = block.cumsum(axis=1)
+            s, m, c = _ssc(cp, phi)
+
+            # create df, modify for geodatabase format
+            df = pd.DataFrame(block[:, 1:], columns=cols,
+                              index=compiled.names[start:start + len(block)])
+            df.index.name = 'SampleID'
+            df.insert(0, 'BCSand', s)
+            df.insert(1, 'BCSilt', m)
+            df.insert(2, 'BCClay', c)
+
+            yield df
+
+    def _names(self, title, file):
+        """
+        Hidden method to add lith and area attributes to a plot title and save file name.
+
+        Parameters
+        ----------
+        title : string
+            plot title
+        file : string
+            save file name
+
+        Returns
+        -------
+        title : string
+            plot title with lith and area
+        file : string
+            save file name with lith and area
+
+        """
+        if type(self.area) != str and type(self.lith) != str:
+            pass
+        elif type(self.area) != str and type(self.lith) == str:
+            title = title + ' - ' + self.lith
+            file = file + '_' + self.lith
+        elif type(self.area) == str and type(self.lith) != str:
+            title = title + ' - ' + self.area
+            file = file + '_' + self.area
+        else:
+            both = '{0} ({1})'.format(self.lith, self.area)
+            title = title + ' - ' + both
+            file = file + '_' + self.lith + '_' + self.area
+
+        return title, file
+
+    def _output(self, fig, filesave, save=True, fmt=None, show=False):
+        """
+        Hidden method to save a plot as PDF and jpeg files and/or show it, and return it to the caller.
+
+        Parameters
+        ----------
+        fig : Matplotlib Figure instance
+            plot
+        filesave : string
+            path of saved files, without extension
+        save : Bool, optional
+            Option to save files. The default is True.
+        fmt : string, optional
+            image format of returned bytes, e.g. 'png'. The default is None (Figure returned).
+        show : Bool, optional
+            Option to show the plot, a pyplot figure from _figure, with pyplot. The default is False.
+
+        Returns
+        -------
+        out : Figure or bytes
+            the figure, or bytes of the figure in format fmt.
+
+        """
+        if save:
+            fig.savefig(fname=filesave + '.pdf', dpi=300, bbox_inches='tight')
+            fig.savefig(fname=filesave + '.jpg', dpi=300, bbox_inches='tight')
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show()
+            plt.close(fig)
 
-        return st
+        return fig if fmt is None else _render(fig, fmt)
 
-    def _gsd_format(self):
+    def _gsd_format(self, pyplot=False):
         """
-        Hidden method to format grain size distribution plots.
+        Hidden method to format grain size distribution plots, on a pyplot figure to be shown if pyplot is True.
 
         Returns
         -------
@@ -295,7 +1774,8 @@ class GrainSizeDist():
         """
 
         # create figure and axes
-        fig, ax = plt.subplots(1, 1, figsize=(8, 8), dpi=300)
+        fig = _figure((8, 8), pyplot=pyplot)
+        ax = fig.subplots(1, 1)
         ax2 = ax.twinx()
         ax3 = ax.twiny()
 
@@ -371,7 +1851,210 @@ class GrainSizeDist():
 
         return fig, ax, ax2, ax3
 
-    def gsd_single(self, files=None, i=0, j=0):
+    def _gsd_single_plot(self, sample, bins, data, cp, st, pyplot=False):
+        """
+        Hidden method to plot grain size distribution of one sample for gsd_single.
+
+        Parameters
+        ----------
+        sample : string
+            sample name
+        bins : Dataframe
+            Dataframe of bins, as bins().
+        data : Dataframe
+            Dataframe of grain size data, as data().
+        cp : Dataframe
+            Dataframe of cumulative percentages, as datacp().
+        st : Dataframe
+            Dataframe of statistics, as datast().
+        pyplot : Bool, optional
+            Option to plot on a pyplot figure to be shown. The default is False.
+
+        Returns
+        -------
+        fig : Matplotlib Figure instance
+            Grain size distribution plot of sample.
+
+        """
+        # create figure and axes
+        fig, ax, ax2, ax3 = self._gsd_format(pyplot)
+
+        ax.set_ylim(0, max(data[sample]) + 0.25)
+        ax.set_title(sample, size=18, weight='bold', style='italic')
+
+        # plot bars of volume percentages within each bin
+        ax.bar(bins['phi'], data[sample], width=0.105,
+               color='0.7', align='edge', edgecolor='k', lw=0.2)
+
+        # plot cumulative percentage line
+        ax2.plot(bins['phi'], cp[sample].replace(
+            0, np.nan), color='#AB2328', linewidth=2.5)
+
+        # plot statistic lines
+        med_ln = ax.axvline(st[sample].loc['median'],
+                            color='blue', ls=(0, (1, 1)), lw=1.5)
+        mean_ln = ax.axvline(
+            st[sample].loc['mean_folk'], color='blue', lw=1.5)
+        modes = st[sample].iloc[19::2]
+        mode_label = []
+        x = 1
+        for mode in modes:
+            modes_ln = ax.axvline(mode, color='black', ls=(
+                0, (5, 1)), lw=1.5, zorder=4)
+            if mode != np.nan:
+                label = 'mode%d: ' % x + \
+                    str(round(modes.iloc[x-1], 1)) + '\u03C6' + \
+                    ', {}'.format(wentworth_gs(modes.iloc[x-1]))
+                mode_label.append(label)
+            x += 1
+
+        # key and annotation text
+        sed = st[sample].loc['sediment_class']
+        sort = st[sample].loc['sorting_folk_class']
+        sand = str(round(st[sample].loc['sand'], 1))
+        silt = str(round(st[sample].loc['silt'], 1))
+        clay = str(round(st[sample].loc['clay'], 1))
+        ax.annotate('{0}, {1}  -  sand: {2}%,  silt: {3}%,  clay: {4}%'.format(
+            sed, sort, sand, silt, clay), xy=(0.5, -0.105), xycoords='axes fraction',
+            horizontalalignment='center')
+
+        mean_lab = 'mean: {0:.1f}\u03C6, {1}'.format(st[sample].loc['mean_folk'],
+                                                     st[sample].loc['mean_folk_ww'])
+        med_lab = 'median: {0:.1f}\u03C6, {1}'.format(st[sample].loc['median'],
+                                                      st[sample].loc['median_ww'])
+        ax.legend(handles=[mean_ln, med_ln], labels=[mean_lab, med_lab],
+                  bbox_to_anchor=(0.5, -0.133), ncol=2, fancybox=False,
+                  frameon=False, loc='center')
+
+        modelab = '  /  '.join(mode_label)
+        ax2.legend(handles=[modes_ln], labels=[modelab], bbox_to_anchor=(0.5, -0.166),
+                   fancybox=False, frameon=False, loc='center')
+
+        skew = str(round(st[sample].loc['skewness_folk'], 2)) + ', {}'.format(
+            st[sample].loc['skewness_folk_class'])
+        kurt = str(round(st[sample].loc['kurtosis_folk'], 2)) + ', {}'.format(
+            st[sample].loc['kurtosis_folk_class'])
+        ax.annotate('skewness_folk: {0}     kurtosis_folk: {1}'.format(skew, kurt), xy=(0.5, -0.204),
+                    xycoords='axes fraction', horizontalalignment='center')
+
+        return fig
+
+    def _ternary_format(self, ax):
+        """
+        Hidden method to format sand-silt-clay ternary diagrams, with Folk (1954) sediment classification fields drawn once as one line collection.
+
+        Parameters
+        ----------
+        ax : Matplotlib axes object
+            axes of ternary diagram
+
+        Returns
+        -------
+        None.
+
+        """
+        h = np.sqrt(3) / 2
+        ax.set_xlim(-0.05, 1.05)
+        ax.set_ylim(-0.07, h + 0.05)
+        ax.set_aspect('equal')
+        ax.axis('off')
+
+        # triangle with clay, silt, and sand apexes
+        lines = [[(0, 0), (1, 0), (0.5, h), (0, 0)]]
+
+        # fields of sand percentage (10, 50, 90%) and silt:clay ratio (1:2, 2:1)
+        for sand in (0.1, 0.5, 0.9):
+            lines.append([(sand / 2, sand * h), (1 - sand / 2, sand * h)])
+        for ratio in (1 / 3, 2 / 3):
+            lines.append([(ratio, 0), (0.1 * ratio + 0.45, 0.9 * h)])
+        ax.add_collection(LineCollection(lines, colors='k', linewidths=0.6, zorder=4))
+
+        # field names
+        names = {0.05: ['clay', 'mud', 'silt'],
+                 0.3: ['sandy clay', 'sandy mud', 'sandy silt'],
+                 0.62: ['clayey\nsand', 'muddy\nsand', 'silty\nsand']}
+        for sand, fields in names.items():
+            for ratio, name in zip((1 / 6, 1 / 2, 5 / 6), fields):
+                ax.annotate(name, xy=((1 - sand) * ratio + sand / 2, sand * h), size=7,
+                            ha='center', va='center', style='italic', zorder=5)
+        ax.annotate('sand', xy=(0.5, 0.95 * h), size=7, ha='center', va='center',
+                    style='italic', zorder=5)
+
+        ax.annotate('Sand', xy=(0.5, h + 0.015), ha='center', va='bottom', size=12)
+        ax.annotate('Clay', xy=(-0.01, -0.015), ha='right', va='top', size=12)
+        ax.annotate('Silt', xy=(1.01, -0.015), ha='left', va='top', size=12)
+
+    def ternary(self, density=10000, gridsize=60, save=True, fmt=None, show=None):
+        """
+        Method to plot sand, silt, and clay proportions of all samples on a sand-silt-clay ternary diagram with Folk (1954) sediment classification fields. Samples are plotted as one scatter collection, or as hexagonal bins shaded by number of samples when there are more samples than density. Plot is saved in jpeg and PDF formats in the directory where data files are located.
+
+        Parameters
+        ----------
+        density : integer, optional
+            Maximum number of samples plotted as points. The default is 10000.
+        gridsize : integer, optional
+            Number of hexagonal bins across the diagram when shading by number of samples. The default is 60.
+        save : Bool, optional
+            Option to save plot files. The default is True.
+        fmt : string, optional
+            image format of returned plot, e.g. 'png'. The default is None (Matplotlib Figure returned).
+        show : Bool, optional
+            Option to show the plot with pyplot. The default is None (shown if Matplotlib uses an interactive backend, e.g. a window or notebook).
+
+        Returns
+        -------
+        fig : Figure or bytes
+            the plot as a Matplotlib Figure, or bytes of format fmt.
+
+        """
+        path = self.path[0]
+        title, file = self._names('Sand-Silt-Clay Ternary Diagram', 'Ternary')
+        show = _showing(show)
+        fig = self._ternary_plot(density, gridsize, show)
+
+        # save figure in sample file directory
+        filesave = path.replace(os.path.basename(path), file)
+
+        return self._output(fig, filesave, save, fmt, show)
+
+    def _ternary_plot(self, density=10000, gridsize=60, pyplot=False):
+        """
+        Hidden method to plot the sand-silt-clay ternary diagram of all samples for ternary, with parameters as ternary; with pyplot, on a pyplot figure to be shown.
+
+        Returns
+        -------
+        fig : Matplotlib Figure instance
+            Ternary diagram of all samples.
+
+        """
+        compiled = self._compiled()
+        phi = compiled.phi()
+
+        # sand, silt, and clay fractions of all samples, block-wise
+        ssc = np.vstack([np.column_stack(_ssc(block.cumsum(axis=1), phi))
+                         for start, block in compiled.blocks()]) / 100
+        x = ssc[:, 1] + ssc[:, 0] / 2
+        y = ssc[:, 0] * np.sqrt(3) / 2
+
+        fig = _figure((8, 7.5), pyplot=pyplot)
+        ax = fig.subplots(1, 1)
+        self._ternary_format(ax)
+
+        if len(x) > density:
+            hb = ax.hexbin(x, y, gridsize=gridsize, bins='log', mincnt=1, cmap='Greys',
+                           extent=(0, 1, 0, np.sqrt(3) / 2), linewidths=0, zorder=2)
+            fig.colorbar(hb, ax=ax, shrink=0.5, pad=0.02).set_label(
+                'Number of samples', size=10, style='italic')
+        else:
+            ax.scatter(x, y, s=10, color='#AB2328', edgecolors='k', linewidths=0.3,
+                       zorder=3)
+
+        title = self._names('Sand-Silt-Clay Ternary Diagram', 'Ternary')[0]
+        ax.set_title(title, size=18, weight='bold', style='italic')
+
+        return fig
+
+    def gsd_single(self, files=None, i=0, j=0, save=True, fmt=None, show=None):
         """
         Method to plot grain size distribution data as a histogram of binned sizes, cumulative percentage line, and statistics. Formatted to show Wentworth scale grain size divisions, x scales in phi units and millimeters, and legend with statistics. User has the option of plotting all files in the GrainSizeDist object (default) or slicing specific file(s) using list of specific sample name(s) or indexing (i, j). Plots are saved in jpeg and PDF formats in the same location as the data files.
 
@@ -383,21 +2066,26 @@ class GrainSizeDist():
             First index location for slicing specific files to be plotted. The default is 0.
         j : integer, optional
             Second index location for slicing specific files to be plotted. The default is 0.
+        save : Bool, optional
+            Option to save plot files. The default is True.
+        fmt : string, optional
+            image format of returned plots, e.g. 'png'. The default is None (Matplotlib Figures returned).
+        show : Bool, optional
+            Option to show each plot with pyplot. The default is None (shown if Matplotlib uses an interactive backend, e.g. a window or notebook).
 
         Returns
         -------
-        None.
+        figs : dictionary
+            the plot of each sample as a Matplotlib Figure, or bytes of format fmt.
 
         """
-        path = self.path
+        compiled = self._compiled()
+        sources = dict(zip(compiled.names, compiled.sources))
         bins = self.bins()
         data = self.data().iloc[:, :-1]
         cp = self.datacp().iloc[:, :-1]
         st = self.datast().iloc[:, :-1]
 
-        # counter for saving files
-        c = 0
-
         # Collect sample names to be plotted
         if files != None:
             samples = files
@@ -407,127 +2095,45 @@ class GrainSizeDist():
             samples = self.samplenames()
 
         # plot all samples
+        show = _showing(show)
+        figs = {}
         for sample in samples:
+            fig = self._gsd_single_plot(sample, bins, data, cp, st, show)
 
-            # create figure and axes
-            fig, ax, ax2, ax3 = self._gsd_format()
-
-            ax.set_ylim(0, max(data[sample]) + 0.25)
-            ax.set_title(sample, size=18, weight='bold', style='italic')
-
-            # plot bars of volume percentages within each bin
-            ax.bar(bins['phi'], data[sample], width=0.105,
-                   color='0.7', align='edge', edgecolor='k', lw=0.2)
-
-            # plot cumulative percentage line
-            ax2.plot(bins['phi'], cp[sample].replace(
-                0, np.nan), color='#AB2328', linewidth=2.5)
-
-            # plot statistic lines
-            med_ln = ax.axvline(st[sample].loc['median'],
-                                color='blue', ls=(0, (1, 1)), lw=1.5)
-            mean_ln = ax.axvline(
-                st[sample].loc['mean_folk'], color='blue', lw=1.5)
-            modes = st[sample].iloc[19::2]
-            mode_label = []
-            x = 1
-            for mode in modes:
-                modes_ln = ax.axvline(mode, color='black', ls=(
-                    0, (5, 1)), lw=1.5, zorder=4)
-                if mode != np.nan:
-                    label = 'mode%d: ' % x + \
-                        str(round(modes[x-1], 1)) + '\u03C6' + \
-                        ', {}'.format(wentworth_gs(modes[x-1]))
-                    mode_label.append(label)
-                x += 1
-
-            # key and annotation text
-            sed = st[sample].loc['sediment_class']
-            sort = st[sample].loc['sorting_folk_class']
-            sand = str(round(st[sample].loc['sand'], 1))
-            silt = str(round(st[sample].loc['silt'], 1))
-            clay = str(round(st[sample].loc['clay'], 1))
-            ax.annotate('{0}, {1}  -  sand: {2}%,  silt: {3}%,  clay: {4}%'.format(
-                sed, sort, sand, silt, clay), xy=(0.5, -0.105), xycoords='axes fraction',
-                horizontalalignment='center')
-
-            mean_lab = 'mean: {0:.1f}\u03C6, {1}'.format(st[sample].loc['mean_folk'],
-                                                         st[sample].loc['mean_folk_ww'])
-            med_lab = 'median: {0:.1f}\u03C6, {1}'.format(st[sample].loc['median'],
-                                                          st[sample].loc['median_ww'])
-            ax.legend(handles=[mean_ln, med_ln], labels=[mean_lab, med_lab],
-                      bbox_to_anchor=(0.5, -0.133), ncol=2, fancybox=False,
-                      frameon=False, loc='center')
-
-            modelab = '  /  '.join(mode_label)
-            ax2.legend(handles=[modes_ln], labels=[modelab], bbox_to_anchor=(0.5, -0.166),
-                       fancybox=False, frameon=False, loc='center')
-
-            skew = str(round(st[sample].loc['skewness_folk'], 2)) + ', {}'.format(
-                st[sample].loc['skewness_folk_class'])
-            kurt = str(round(st[sample].loc['kurtosis_folk'], 2)) + ', {}'.format(
-                st[sample].loc['kurtosis_folk_class'])
-            ax.annotate('skewness_folk: {0}     kurtosis_folk: {1}'.format(skew, kurt), xy=(0.5, -0.204),
-                        xycoords='axes fraction', horizontalalignment='center')
-
-            # save figure in directory with sample files
-            save_pdf = os.path.splitext(path[c])[0] + '.pdf'
-            plt.savefig(fname=save_pdf, dpi=300, bbox_inches='tight')
-
-            save_jpg = os.path.splitext(path[c])[0] + '.jpg'
-            plt.savefig(fname=save_jpg, dpi=300, bbox_inches='tight')
+            # save figure named by sample in directory of its source file, as averaged
+            # replicates and samples of multi-sample files have no file of their own
+            filesave = os.path.join(os.path.dirname(sources[sample]), sample)
+            figs[sample] = self._output(fig, filesave, save, fmt, show)
 
-            # increase counter
-            c += 1
-
-            plt.show()
-            plt.close()
+        return figs
 
-    def gsd_multi(self, bplt=False, cplt=True, stplt=True, ci=True):
+    def _gsd_multi_plot(self, bplt=False, cplt=True, stplt=True, ci=True, pyplot=False):
         """
-        Method to plot grain size distribution data for multiple samples. Formatted to show Wentworth scale grain size divisions, x scales in phi units and millimeters, and legend with statistics. User has the options of plotting: (1) only cumulative frequency curves with 95% confidence interval of the mean (default); (2) only relative frequency histogram of binned data with 95% confidence interval; (3) both relative frequency data (left axis) and cumulative frequency data (left axis) with 95% confidence interval of cumulative curve. Plot is saved in jpeg and PDF formats in the directory where data files are located.
+        Hidden method to plot grain size distribution data for multiple samples for gsd_multi, with parameters as gsd_multi; with pyplot, on a pyplot figure to be shown.
 
-        Parameters
-        ----------
-        bplt : Bool, optional
-            Option to plot data relative frequency histogram. The default is False.
-        cplt : Bool, optional
-            Option to plot cumulative frequency curve. The default is True.
-        stplt : Bool, optional
-            Option to plot data selected statistics and include in legend. The default is True.
-        stplt : Bool, optional
-            Option to plot 95% confidence interval of mean. The default is True.
         Returns
         -------
-        None.
+        fig : Matplotlib Figure instance
+            Grain size distribution plot of all samples.
 
         """
 
-        path = self.path[0]
-        bins = self.bins()['phi']
-        data = self.data().iloc[:, :-1]
-        cp = self.datacp().iloc[:, :-1]
+        compiled = self._compiled()
+        bins = compiled.phi()
         st = self.datast()
 
-        # set savefile name and plot title
-        if type(self.area) != str and type(self.lith) != str:
-            title = 'Mean Grain Size Distribution'
-            file = 'MeanGSD'
-        elif type(self.area) != str and type(self.lith) == str:
-            title = 'Mean Grain Size Distribution' + ' - ' + self.lith
-            file = 'MeanGSD_' + self.lith
-        elif type(self.area) == str and type(self.lith) != str:
-            title = 'Mean Grain Size Distribution' + ' - ' + self.area
-            file = 'MeanGSD_' + self.area
-        else:
-            both = '{0} ({1})'.format(self.lith, self.area)
-            title = 'Mean Grain Size Distribution' + ' - ' + both
-            file = 'MeanGSD_' + self.lith + '_' + self.area
+        # block-wise means and standard errors of all samples
+        n = len(compiled.values)
+        data_mean, data_sem = [pd.Series(x) for x in compiled.meansem()]
+        cp_mean, cp_sem = [pd.Series(x) for x in compiled.meansem(cumulative=True)]
+
+        # set plot title
+        title = self._names('Mean Grain Size Distribution', 'MeanGSD')[0]
 
         # default plot...cumulative curves only
         if bplt == False and cplt == True:
             # set axes and title...move cumulative axis to right side
-            fig, ax, ax2, ax3 = self._gsd_format()
+            fig, ax, ax2, ax3 = self._gsd_format(pyplot)
             ax2.set_visible(False)
             ax.set_title(title, size=18, weight='bold', style='italic')
             ax.set_ylim(0, 100)
@@ -541,25 +2147,26 @@ class GrainSizeDist():
             ax.set(yticks=ax_ytick_loc)
 
             # plot all cumulative sample curves
-            for column, contents in cp.replace(0, np.nan).iteritems():
-                ax.plot(bins, contents, color='k', linewidth=0.5, zorder=2)
+            for start, block in compiled.blocks(cumulative=True):
+                for contents in block:
+                    ax.plot(bins, np.where(contents == 0, np.nan, contents),
+                            color='k', linewidth=0.5, zorder=2)
 
             # plot mean cumulative curve
-            ax.plot(bins, cp.mean(axis=1).replace(0, np.nan), color='#AB2328',
+            ax.plot(bins, cp_mean.replace(0, np.nan), color='#AB2328',
                     linewidth=2.5, zorder=2.2)
 
             # 95% CI cumulative curve
-            n = len(cp.columns)
-            sem = cp.sem(axis=1)
+            sem = cp_sem
 
             # use z (>=30) or t (<30) distribution
             if ci == True:
                 if n >= 30:
                     ci = scipy.stats.norm.interval(
-                        alpha=0.95, loc=cp.mean(axis=1), scale=sem)
+                        0.95, loc=cp_mean, scale=sem)
                 else:
                     ci = scipy.stats.t.interval(
-                        alpha=0.95, df=n-1, loc=cp.mean(axis=1), scale=sem)
+                        0.95, df=n-1, loc=cp_mean, scale=sem)
 
                 ax.fill_between(bins, ci[1], ci[0],
                                 color='#AB2328', alpha=0.3, zorder=2.1)
@@ -567,30 +2174,29 @@ class GrainSizeDist():
         # optional plot...both mean bars and mean cumulative
         elif bplt == True and cplt == True:
             # set axes and title
-            fig, ax, ax2, ax3 = self._gsd_format()
-            ax.set_ylim(0, max(data.mean(axis=1)) + 0.25)
+            fig, ax, ax2, ax3 = self._gsd_format(pyplot)
+            ax.set_ylim(0, max(data_mean) + 0.25)
             ax.set_title(title, size=18, weight='bold', style='italic')
 
             # plot bars of mean data
-            ax.bar(bins, data.mean(axis=1), width=0.1, color='0.7', align='edge',
+            ax.bar(bins, data_mean, width=0.1, color='0.7', align='edge',
                    edgecolor='k', lw=0.2, zorder=1)
 
             # plot cumulative mean curve
-            ax2.plot(bins, cp.mean(axis=1).replace(0, np.nan), color='#AB2328',
+            ax2.plot(bins, cp_mean.replace(0, np.nan), color='#AB2328',
                      linewidth=2.5, zorder=2.2)
 
             # plot 95% CI cumulative curves
-            n = len(cp.columns)
-            sem = cp.sem(axis=1)
+            sem = cp_sem
 
             # use z (>=30) or t (<30) distribution for CI
             if ci == True:
                 if n >= 30:
                     ci = scipy.stats.norm.interval(
-                        alpha=0.95, loc=cp.mean(axis=1), scale=sem)
+                        0.95, loc=cp_mean, scale=sem)
                 else:
                     ci = scipy.stats.t.interval(
-                        alpha=0.95, df=n-1, loc=cp.mean(axis=1), scale=sem)
+                        0.95, df=n-1, loc=cp_mean, scale=sem)
 
                 ax2.fill_between(
                     bins, ci[1], ci[0], color='#AB2328', alpha=0.3, zorder=2.1)
@@ -598,30 +2204,31 @@ class GrainSizeDist():
         # optional plot...bars only
         else:
             # set axes and title...no cumulative axis on right
-            fig, ax, ax2, ax3 = self._gsd_format()
+            fig, ax, ax2, ax3 = self._gsd_format(pyplot)
             ax2.set_visible(False)
-            ax.set_ylim(0, data.max().max() + 0.25)
+            ax.set_ylim(0, max(block.max() for start, block in compiled.blocks()) + 0.25)
             ax.set_title(title, size=18, weight='bold', style='italic')
 
             # plot all sample curves
-            for column, contents in data.replace(0, np.nan).iteritems():
-                ax.plot(bins, contents, color='k', linewidth=0.5, zorder=1.1)
+            for start, block in compiled.blocks():
+                for contents in block:
+                    ax.plot(bins, np.where(contents == 0, np.nan, contents),
+                            color='k', linewidth=0.5, zorder=1.1)
 
             # plot mean bars
-            ax.bar(bins, data.mean(axis=1), width=0.1, color='0.7', align='edge',
+            ax.bar(bins, data_mean, width=0.1, color='0.7', align='edge',
                    edgecolor='k', lw=0.2, zorder=1)
 
             # plot 95% CI curve
-            n = len(data.columns)
-            sem = data.sem(axis=1)
+            sem = data_sem
 
             if ci == True:
                 if n >= 30:
                     ci = scipy.stats.norm.interval(
-                        alpha=0.95, loc=data.mean(axis=1), scale=sem)
+                        0.95, loc=data_mean, scale=sem)
                 else:
                     ci = scipy.stats.t.interval(
-                        alpha=0.95, df=n-1, loc=data.mean(axis=1), scale=sem)
+                        0.95, df=n-1, loc=data_mean, scale=sem)
 
                 ax.fill_between(bins, ci[1], ci[0],
                                 color='#AB2328', alpha=0.3, zorder=1.2)
@@ -642,8 +2249,8 @@ class GrainSizeDist():
                     0, (5, 1)), lw=1.5, zorder=4)
                 if mode != np.nan:
                     label = 'mode%d: ' % x + \
-                        str(round(modes[x-1], 1)) + '\u03C6' + \
-                        ', {}'.format(wentworth_gs(modes[x-1]))
+                        str(round(modes.iloc[x-1], 1)) + '\u03C6' + \
+                        ', {}'.format(wentworth_gs(modes.iloc[x-1]))
                     mode_label.append(label)
                 x += 1
 
@@ -679,11 +2286,347 @@ class GrainSizeDist():
             ax.annotate('skewness_folk: {0}     kurtosis_folk: {1}'.format(skew, kurt), xy=(0.5, -0.204),
                         xycoords='axes fraction', horizontalalignment='center')
 
+        return fig
+
+    def gsd_multi(self, bplt=False, cplt=True, stplt=True, ci=True, save=True, fmt=None,
+                  show=None):
+        """
+        Method to plot grain size distribution data for multiple samples. Formatted to show Wentworth scale grain size divisions, x scales in phi units and millimeters, and legend with statistics. User has the options of plotting: (1) only cumulative frequency curves with 95% confidence interval of the mean (default); (2) only relative frequency histogram of binned data with 95% confidence interval; (3) both relative frequency data (left axis) and cumulative frequency data (left axis) with 95% confidence interval of cumulative curve. Plot is saved in jpeg and PDF formats in the directory where data files are located.
+
+        Parameters
+        ----------
+        bplt : Bool, optional
+            Option to plot data relative frequency histogram. The default is False.
+        cplt : Bool, optional
+            Option to plot cumulative frequency curve. The default is True.
+        stplt : Bool, optional
+            Option to plot data selected statistics and include in legend. The default is True.
+        stplt : Bool, optional
+            Option to plot 95% confidence interval of mean. The default is True.
+        save : Bool, optional
+            Option to save plot files. The default is True.
+        fmt : string, optional
+            image format of returned plot, e.g. 'png'. The default is None (Matplotlib Figure returned).
+        show : Bool, optional
+            Option to show the plot with pyplot. The default is None (shown if Matplotlib uses an interactive backend, e.g. a window or notebook).
+
+        Returns
+        -------
+        fig : Figure or bytes
+            the plot as a Matplotlib Figure, or bytes of format fmt.
+
+        """
+
+        path = self.path[0]
+        title, file = self._names('Mean Grain Size Distribution', 'MeanGSD')
+        show = _showing(show)
+        fig = self._gsd_multi_plot(bplt, cplt, stplt, ci, show)
+
         # save figure in sample file directory
         filesave = path.replace(os.path.basename(path), file)
 
-        save_pdf = filesave + '.pdf'
-        plt.savefig(fname=save_pdf, dpi=300, bbox_inches='tight')
+        return self._output(fig, filesave, save, fmt, show)
+
+    def _table_plots(self, st):
+        """
+        Hidden method to plot tables of selected statistics of all samples for report, _REPORT_ROWS samples per page.
+
+        Parameters
+        ----------
+        st : Dataframe
+            Dataframe of statistics, as datast().
+
+        Yields
+        ------
+        fig : Matplotlib Figure instance
+            Table of statistics of one page of samples.
+
+        """
+        table = st.loc[_REPORT_STATS].T
+        cells = table.map(lambda x: '{:.2f}'.format(x) if isinstance(x, (float, np.floating)) else str(x))
+        labels = [c.replace('_folk', '').replace('_', ' ') for c in table.columns]
+
+        for start in range(0, len(cells), _REPORT_ROWS):
+            page = cells.iloc[start:start + _REPORT_ROWS]
+            fig = _figure((11, 8.5), dpi=100)
+            ax = fig.subplots(1, 1)
+            ax.axis('off')
+            ax.set_title('Grain Size Statistics ({0}-{1} of {2})'.format(
+                start + 1, start + len(page), len(cells)), size=14, weight='bold', style='italic')
+            tab = ax.table(cellText=page.to_numpy(), rowLabels=list(page.index),
+                           colLabels=labels, loc='upper center', cellLoc='center')
+            tab.auto_set_font_size(False)
+            tab.set_fontsize(6)
+            tab.scale(1, 1.1)
+
+            yield fig
+
+    def report(self, filename=None, single=True, multi=True, ternary=True, table=True, **kwargs):
+        """
+        Method to save grain size distribution plots of all samples, the plot of multiple samples, the ternary diagram, and tables of statistics as one multi-page PDF report. Each page is drawn only after the previous page is written, then cleared and collected, so that one page is held in memory at a time, and fonts are embedded once for the whole report.
+
+        Parameters
+        ----------
+        filename : string, optional
+            path of saved report. The default is None (Report.pdf, with lith and area attributes, in the directory where data files are located).
+        single : Bool, optional
+            Option to include plots of each sample, as gsd_single. The default is True.
+        multi : Bool, optional
+            Option to include plot of multiple samples, as gsd_multi. The default is True.
+        ternary : Bool, optional
+            Option to include sand-silt-clay ternary diagram, as ternary. The default is True.
+        table : Bool, optional
+            Option to include tables of statistics of all samples. The default is True.
+        **kwargs
+            parameters of gsd_multi plot, e.g. bplt and cplt.
+
+        Returns
+        -------
+        filename : string
+            path of saved report.
+
+        """
+        if filename is None:
+            path = self.path[0]
+            filename = path.replace(os.path.basename(path), self._names('', 'Report')[1] + '.pdf')
+
+        st = self.datast()
+
+        # each page is drawn only when the previous page has been written
+        def pages():
+            if multi:
+                yield self._gsd_multi_plot(**kwargs)
+            if ternary:
+                yield self._ternary_plot()
+            if table:
+                yield from self._table_plots(st)
+            if single:
+                bins = self.bins()
+                data = self.data().iloc[:, :-1]
+                cp = self.datacp().iloc[:, :-1]
+                for sample in self.samplenames():
+                    yield self._gsd_single_plot(sample, bins, data, cp, st.iloc[:, :-1])
+
+        # clear each page once written, and collect its artists, which refer to each other in cycles
+        with PdfPages(filename) as pdf:
+            for fig in pages():
+                pdf.savefig(fig, bbox_inches='tight')
+                fig.clf()
+                gc.collect()
+
+        return filename
+
+
+class GrainSizeGroups():
+    """
+    Class for groups of samples of a GrainSizeDist object, grouped by attributes of GrainSizeDist.metadata(). All groups share the compiled data of the GrainSizeDist object, and means and standard errors of all groups are calculated together in one pass over the data.
+
+    Parameters
+    ----------
+    gsd: GrainSizeDist object
+        samples to be grouped
+    by: string or list
+        attribute(s) of GrainSizeDist.metadata() used to group samples
+
+    """
+
+    def __init__(self, gsd, by):
+        self.gsd = gsd
+        self.by = [by] if type(by) == str else list(by)
+
+        # integer code of each sample's group; samples missing attributes are ignored
+        meta = self.gsd.metadata()[self.by]
+        if len(self.by) == 1:
+            self._codes, self._labels = pd.factorize(meta.iloc[:, 0], sort=True)
+        else:
+            self._codes, self._labels = pd.factorize(
+                pd.MultiIndex.from_frame(meta), sort=True)
+        self._moments = {}
+
+    def _meansem(self, cumulative=False):
+        """Hidden method to collect number of samples, means, and standard errors of all groups, calculated once for the compiled data of the GrainSizeDist object, and again if its files change on disk."""
+        key = (self.gsd._key(*_COMPILE), self.gsd.replicates, cumulative)
+        if key not in self._moments:
+            # discard moments of data since changed
+            self._moments = {k: v for k, v in self._moments.items() if k[:2] == key[:2]}
+            self._moments[key] = self.gsd._compiled().groupmeansem(
+                self._codes, len(self._labels), cumulative)
+
+        return self._moments[key]
+
+    def names(self):
+        """
+        Collects names of groups.
+
+        Returns
+        -------
+        names : list
+            group names; tuples if grouped by more than one attribute
+
+        """
+        return list(self._labels)
+
+    def size(self):
+        """
+        Counts samples of each group.
+
+        Returns
+        -------
+        n : Series
+            number of samples per group
+
+        """
+        n, mean, sem = self._meansem()
+
+        return pd.Series(n, index=self._labels)
+
+    def mean(self, cumulative=False):
+        """
+        Calculates mean of each group per bin, ordered as GrainSizeDist.bins().
+
+        Parameters
+        ----------
+        cumulative : Bool, optional
+            Option for means of cumulative percentages. The default is False.
+
+        Returns
+        -------
+        mean : Dataframe
+            Dataframe of means, with groups as columns.
+
+        """
+        n, mean, sem = self._meansem(cumulative)
+
+        return pd.DataFrame(mean.T, columns=self._labels)
+
+    def sem(self, cumulative=False):
+        """
+        Calculates standard error of the mean of each group per bin, ordered as GrainSizeDist.bins().
+
+        Parameters
+        ----------
+        cumulative : Bool, optional
+            Option for standard errors of cumulative percentages. The default is False.
+
+        Returns
+        -------
+        sem : Dataframe
+            Dataframe of standard errors of the means, with groups as columns.
+
+        """
+        n, mean, sem = self._meansem(cumulative)
+
+        return pd.DataFrame(sem.T, columns=self._labels)
+
+    def ci(self, cumulative=False, conf=0.95):
+        """
+        Calculates confidence interval of the mean of each group per bin, using z (>=30 samples) or t (<30 samples) distribution as GrainSizeDist.gsd_multi().
+
+        Parameters
+        ----------
+        cumulative : Bool, optional
+            Option for confidence intervals of cumulative percentages. The default is False.
+        conf : float, optional
+            Confidence level. The default is 0.95.
+
+        Returns
+        -------
+        lower : Dataframe
+            Dataframe of lower limits, with groups as columns.
+        upper : Dataframe
+            Dataframe of upper limits, with groups as columns.
+
+        """
+        n, mean, sem = self._meansem(cumulative)
+        n = n[:, np.newaxis]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(n >= 30, scipy.stats.norm.ppf(0.5 + conf / 2),
+                         scipy.stats.t.ppf(0.5 + conf / 2, df=np.maximum(n - 1, 1)))
+        lower = pd.DataFrame((mean - z * sem).T, columns=self._labels)
+        upper = pd.DataFrame((mean + z * sem).T, columns=self._labels)
+
+        return lower, upper
+
+    def datast(self, prom=0.1):
+        """
+        Calculates statistics of the mean grain size distribution of each group, as the 'mean' column of GrainSizeDist.datast().
+
+        Parameters
+        ----------
+        prom : integer or float, optional
+            Peak prominence used for collecting significant modes in multimodal samples. The default is 0.1.
+
+        Returns
+        -------
+        st : Dataframe
+            Dataframe of grain size statistics, with groups as columns.
+
+        """
+        n, mean, sem = self._meansem()
+        st = _stats(mean, self.gsd._compiled().phi(), prom)
+
+        return _stats_frame(st, self._labels)
+
+    def get_group(self, name):
+        """
+        Collects samples of one group as a GrainSizeDist object, sharing compiled data. Plot titles use the group name as lith and/or area attributes.
+
+        Parameters
+        ----------
+        name : string or tuple
+            group name, as in names()
+
+        Returns
+        -------
+        gsd : GrainSizeDist object
+            Samples of the group.
+
+        """
+        label = name if type(name) == tuple else (name,)
+        attrs = dict(zip(self.by, label))
+
+        # attributes other than area are shown as lithology in plot titles
+        area = attrs.pop('area', None)
+        lith = ', '.join(str(v) for v in attrs.values()) if attrs else None
+        if lith is None and type(self.gsd.lith) == str:
+            lith = self.gsd.lith
+        if area is None and type(self.gsd.area) == str:
+            area = self.gsd.area
+
+        rows = np.flatnonzero(self._codes == self._labels.get_loc(name))
+
+        return self.gsd._subset(rows, lith=lith, area=None if area is None else str(area))
+
+    def compare(self, name_a, name_b, **kwargs):
+        """
+        Tests differences between grain size distributions of two groups with compare.compare(), from data compiled once. Keyword arguments are passed to compare.compare().
+
+        Parameters
+        ----------
+        name_a : string or tuple
+            name of first group, as in names()
+        name_b : string or tuple
+            name of second group, as in names()
+
+        Returns
+        -------
+        result : Comparison object
+            Differences and p-values per bin, per statistic, and of mean cumulative curves.
+
+        """
+        from .compare import compare
+
+        return compare(self.get_group(name_a), self.get_group(name_b), **kwargs)
+
+    def gsd_multi(self, **kwargs):
+        """
+        Method to plot grain size distribution data for multiple samples of each group with GrainSizeDist.gsd_multi(), from data compiled once. Keyword arguments are passed to GrainSizeDist.gsd_multi().
 
-        save_jpg = filesave + '.jpg'
-        plt.savefig(fname=save_jpg, dpi=300, bbox_inches='tight')
+        Returns
+        -------
+        figs : dictionary
+            the plot of each group, as GrainSizeDist.gsd_multi().
+
+        """
+        return {name: self.get_group(name).gsd_multi(**kwargs) for name in self.names()}
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains sediment mixing models, including end-member mixing analysis (EMMA) of grain size distributions by non-negative matrix factorization.
+
+
+--------------------------------------
+Copyright 2021-2022 Matthew A. Massey
+
+This file is part of GrainPy.
+
+GrainPy is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version. GrainPy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with GrainPy. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+__all__ = [
+    "EndMemberModel",
+    "emma",
+    "emma_curve",
+]
+
+
+import numpy as np
+import pandas as pd
+from .grainsize import _BLOCK_ROWS
+
+
+# small value preventing division by zero
+_EPS = 1e-12
+
+# projected gradient steps for abundances (all samples) and end-members per iteration
+_STEPS_A = 3
+_STEPS_E = 20
+
+
+class EndMemberModel():
+    """
+    Class for results of end-member mixing analysis. Every sample is modelled as a mixture of end-member grain size distributions, with abundances summing to 100%.
+
+    Parameters
+    ----------
+    members : Dataframe
+        Dataframe of end-member grain size distributions, with bins as rows ordered as GrainSizeDist.bins() and end-members as columns.
+    abundances : Dataframe
+        Dataframe of end-member abundances (%), with samples as rows and end-members as columns.
+    r2 : float
+        coefficient of determination of all modelled data
+    r2_samples : Series
+        coefficient of determination of each sample
+    r2_bins : Series
+        coefficient of determination of each bin
+    n_iter : integer
+        number of iterations used in fitting
+
+    """
+
+    def __init__(self, members, abundances, r2, r2_samples, r2_bins, n_iter):
+        self.members = members
+        self.abundances = abundances
+        self.r2 = r2
+        self.r2_samples = r2_samples
+        self.r2_bins = r2_bins
+        self.n_iter = n_iter
+
+    def modelled(self):
+        """
+        Calculates modelled grain size distributions of all samples.
+
+        Returns
+        -------
+        data : Dataframe
+            Dataframe of modelled grain size distributions, with samples as columns as GrainSizeDist.data().
+
+        """
+        return (self.members @ self.abundances.T) / 100
+
+
+def _blocks(X):
+    """Hidden function to yield start row and each block of rows of samples-by-bins array X in its own dtype, e.g. of a memory-mapped file; blocks are promoted to float64 in products with float64 arrays."""
+    for start in range(0, len(X), _BLOCK_ROWS):
+        yield start, X[start:start + _BLOCK_ROWS]
+
+
+def _distances(X, v):
+    """Hidden function to calculate squared distances of every row of samples-by-bins array X from v, block-wise."""
+    return np.concatenate([((block - v) ** 2).sum(axis=1) for start, block in _blocks(X)])
+
+
+def _initial(X, n_members):
+    """Hidden function to select initial end-members as mutually most different samples, beginning with the sample most different from the mean."""
+    mean = sum(block.sum(axis=0, dtype=float) for start, block in _blocks(X)) / len(X)
+    chosen = [np.argmax(_distances(X, mean))]
+    dist = _distances(X, np.asarray(X[chosen[0]], dtype=float))
+    while len(chosen) < n_members:
+        chosen.append(np.argmax(dist))
+        dist = np.minimum(dist, _distances(X, np.asarray(X[chosen[-1]], dtype=float)))
+
+    return np.asarray(X[chosen], dtype=float) + _EPS
+
+
+def _simplex(V, z=1.0):
+    """Hidden function to project each row of V onto non-negative values summing to z, for all rows at once (Michelot, 1986)."""
+    active = np.ones(V.shape, dtype=bool)
+    for x in range(V.shape[1]):
+        theta = ((V * active).sum(axis=1) - z) / active.sum(axis=1)
+        still = V > theta[:, np.newaxis]
+        if (still == active).all():
+            break
+        active = still
+
+    return np.maximum(V - theta[:, np.newaxis], 0)
+
+
+def _fit(X, E, max_iter, tol):
+    """
+    Hidden function to factorize samples-by-bins array X into non-negative abundances A (rows summing to 1) and end-members E (rows summing to 100). Abundances and end-members are solved in turn by projected gradient steps for blocks of samples, using only small Gram matrices within each step, so that X is read once per iteration in its own dtype.
+
+    Returns
+    -------
+    A : numpy array
+        samples-by-end-members array of abundances
+    E : numpy array
+        end-members-by-bins array of end-members
+    n_iter : integer
+        number of iterations
+
+    """
+    A = np.full((len(X), len(E)), 1 / len(E))
+    E = _simplex(E, 100)
+    xx = sum(np.square(block, dtype=float).sum() for start, block in _blocks(X))
+    prev = np.inf
+
+    for n_iter in range(1, max_iter + 1):
+        # abundances of each block of samples, with Gram matrices of abundances for end-members
+        G = E @ E.T
+        step = 1 / (np.linalg.eigvalsh(G)[-1] + _EPS)
+        H = np.zeros(G.shape)
+        AX = np.zeros(E.shape)
+        for start, block in _blocks(X):
+            a = A[start:start + len(block)]
+            XE = block @ E.T
+            for x in range(_STEPS_A):
+                a = _simplex(a - step * (a @ G - XE))
+            A[start:start + len(block)] = a
+            H += a.T @ a
+            AX += a.T @ block
+
+        # end-members
+        step = 1 / (np.linalg.eigvalsh(H)[-1] + _EPS)
+        for x in range(_STEPS_E):
+            E = _simplex(E - step * (H @ E - AX), 100)
+
+        # squared error without forming modelled array
+        loss = xx - 2 * np.sum(AX * E) + np.sum(H * (E @ E.T))
+        if np.isfinite(prev) and prev - loss <= tol * max(prev, _EPS):
+            break
+        prev = loss
+
+    return A, E, n_iter
+
+
+def _goodness(X, A, E):
+    """Hidden function to calculate coefficients of determination of all data, each sample, and each bin of the model A @ E of samples-by-bins array X, in two block-wise passes."""
+    colmean = sum(block.sum(axis=0, dtype=float) for start, block in _blocks(X)) / len(X)
+    mean = colmean.mean()
+
+    res, tot, res_bins, tot_bins, res_samples, tot_samples = 0, 0, 0, 0, [], []
+    for start, block in _blocks(X):
+        resid = (block - A[start:start + len(block)] @ E) ** 2
+        res += resid.sum()
+        tot += ((block - mean) ** 2).sum()
+        res_bins = res_bins + resid.sum(axis=0)
+        tot_bins = tot_bins + ((block - colmean) ** 2).sum(axis=0)
+        res_samples.append(resid.sum(axis=1))
+        tot_samples.append(((block - block.mean(axis=1, dtype=float, keepdims=True)) ** 2).sum(axis=1))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (1 - res / tot, 1 - np.concatenate(res_samples) / np.concatenate(tot_samples),
+                1 - res_bins / tot_bins)
+
+
+def emma(gso, n_members=3, init=None, max_iter=500, tol=1e-5):
+    """
+    Function for end-member mixing analysis of all samples of a GrainSizeDist object, by non-negative matrix factorization with end-member abundances summing to 100%.
+
+    Parameters
+    ----------
+    gso : class
+        Object of GrainSizeDist class.
+    n_members : integer, optional
+        number of end-members. The default is 3.
+    init : EndMemberModel object or numpy array, optional
+        end-members used to start fitting (warm start), e.g. the result of an earlier fit; extra end-members are added from the samples fitted worst. The default is None (end-members started from mutually most different samples).
+    max_iter : integer, optional
+        maximum number of iterations. The default is 500.
+    tol : float, optional
+        relative decrease of squared error at which fitting stops. The default is 1e-5.
+
+    Returns
+    -------
+    model : EndMemberModel object
+        End-members, abundances, and goodness of fit.
+
+    """
+    compiled = gso._compiled()
+    X = compiled.values
+
+    # starting end-members
+    if init is None:
+        E = _initial(X, n_members)
+    else:
+        E = init.members.to_numpy().T if isinstance(init, EndMemberModel) else np.asarray(init)
+        E = np.array(E[:n_members], dtype=float) + _EPS
+        while len(E) < n_members:
+            A, E, n = _fit(X, E, 1, tol)
+            sse = [((block - A[start:start + len(block)] @ E) ** 2).sum(axis=1)
+                   for start, block in _blocks(X)]
+            worst = np.argmax(np.concatenate(sse))
+            E = np.vstack([E, np.asarray(X[worst], dtype=float) + _EPS])
+
+    A, E, n_iter = _fit(X, E, max_iter, tol)
+    r2, r2_samples, r2_bins = _goodness(X, A, E)
+
+    labels = ['EM' + str(x + 1) for x in range(n_members)]
+    members = pd.DataFrame(E.T, columns=labels)
+    abundances = pd.DataFrame(100 * A, index=compiled.names, columns=labels)
+
+    return EndMemberModel(members, abundances, r2, pd.Series(r2_samples, index=compiled.names),
+                          pd.Series(r2_bins), n_iter)
+
+
+def emma_curve(gso, n_members=range(2, 11), max_iter=500, tol=1e-5):
+    """
+    Function for end-member mixing analysis of all samples of a GrainSizeDist object with increasing numbers of end-members, each fit warm started from the previous one. Goodness of fit curves help choose the number of end-members.
+
+    Parameters
+    ----------
+    gso : class
+        Object of GrainSizeDist class.
+    n_members : list or range, optional
+        numbers of end-members, in increasing order. The default is range(2, 11).
+    max_iter : integer, optional
+        maximum number of iterations of each fit. The default is 500.
+    tol : float, optional
+        relative decrease of squared error at which each fit stops. The default is 1e-5.
+
+    Returns
+    -------
+    models : dictionary
+        EndMemberModel object for each number of end-members.
+    fit : Dataframe
+        Dataframe of coefficient of determination of all data ('r2'), mean of samples ('r2_samples') and bins ('r2_bins'), and iterations ('n_iter') for each number of end-members.
+
+    """
+    models = {}
+    model = None
+    for n in n_members:
+        model = emma(gso, n, init=model, max_iter=max_iter, tol=tol)
+        models[n] = model
+
+    fit = pd.DataFrame({'r2': [m.r2 for m in models.values()],
+                        'r2_samples': [m.r2_samples.mean() for m in models.values()],
+                        'r2_bins': [m.r2_bins.mean() for m in models.values()],
+                        'n_iter': [m.n_iter for m in models.values()]},
+                       index=pd.Index(list(models.keys()), name='n_members'))
+
+    return models, fit
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains readers of grain size data files, chosen by file extension. All readers find the row of the smallest bin (anchor row) and collect data and bins from the following rows, so that Excel workbooks, CSV/TSV text files, and other instrument exports are compiled alike. Workbooks and text files holding many samples, one per column or one per sheet, are read in one parse by read_samples.
+
+
+--------------------------------------
+Copyright 2021-2022 Matthew A. Massey
+
+This file is part of GrainPy.
+
+GrainPy is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version. GrainPy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with GrainPy. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+__all__ = [
+    "register_reader",
+    "read_sample",
+    "read_samples",
+]
+
+
+import os
+import csv
+import numpy as np
+import pandas as pd
+
+
+def _to_float(value):
+    """Hidden function to convert a text cell to float; returns NaN if not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _not_found(path, bin_min):
+    """Hidden function to create the error of a file without the smallest bin."""
+    return ValueError('Smallest bin {} not found in {}'.format(bin_min, path))
+
+
+def _delimiter(text, bin_min, path):
+    """Hidden function to choose the delimiter of a text file as tab, semicolon, or comma, whichever splits the anchor row into a cell of the smallest bin, so that delimiters in header or comment lines are ignored."""
+    for line in text.splitlines():
+        for d in ('\t', ';', ','):
+            if d in line and bin_min in [_to_float(v) for v in next(csv.reader([line], delimiter=d))]:
+                return d
+
+    raise _not_found(path, bin_min)
+
+
+def read_excel(path, bin_min, rows, data_col, bin_col):
+    """
+    Function to read data and bins of one sample from an Excel workbook (.xlsx or .xls).
+
+    Parameters
+    ----------
+    path : string
+        path of file
+    bin_min : integer or float
+        value of smallest grain size bin in microns, marking the anchor row
+    rows : integer
+        number of rows containing data and bin sizes
+    data_col : integer
+        vertical column number containing data
+    bin_col : integer
+        vertical column number containing bin sizes
+
+    Returns
+    -------
+    data : numpy array
+        data from anchor row, in file order
+    bins : numpy array
+        bins from anchor row, in file order
+
+    """
+    return _read_frame(pd.read_excel(path, header=None), bin_min, rows, data_col, bin_col, path)
+
+
+def _read_frame(file, bin_min, rows, data_col, bin_col, path):
+    """Hidden function to collect data and bins from the anchor row of a dataframe of one sheet of path, as read_excel."""
+    i, c = np.where(file == bin_min)
+    if len(i) == 0:
+        raise _not_found(path, bin_min)
+    i = i[0]
+
+    return (file.iloc[i:i + rows, data_col].to_numpy(dtype=float),
+            file.iloc[i:i + rows, bin_col].to_numpy(dtype=float))
+
+
+def read_text(path, bin_min, rows, data_col, bin_col, delimiter=None):
+    """
+    Function to read data and bins of one sample from a delimited text file (.csv, .tsv, or .txt). Only rows up to the last data row are parsed.
+
+    Parameters
+    ----------
+    path : string
+        path of file
+    bin_min : integer or float
+        value of smallest grain size bin in microns, marking the anchor row
+    rows : integer
+        number of rows containing data and bin sizes
+    data_col : integer
+        vertical column number containing data
+    bin_col : integer
+        vertical column number containing bin sizes
+    delimiter : string, optional
+        column delimiter. The default is None (tab, semicolon, or comma, whichever splits the anchor row).
+
+    Returns
+    -------
+    data : numpy array
+        data from anchor row, in file order
+    bins : numpy array
+        bins from anchor row, in file order
+
+    """
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    if delimiter is None:
+        delimiter = _delimiter(text, bin_min, path)
+
+    block = []
+    for row in csv.reader(text.splitlines(), delimiter=delimiter):
+        # anchor row is first row containing smallest bin in any column
+        if not block and bin_min not in [_to_float(v) for v in row]:
+            continue
+        block.append(row)
+        if len(block) == rows:
+            break
+    if not block:
+        raise _not_found(path, bin_min)
+
+    data = np.array([_to_float(r[data_col]) if len(r) > data_col else np.nan for r in block])
+    bins = np.array([_to_float(r[bin_col]) if len(r) > bin_col else np.nan for r in block])
+
+    return data, bins
+
+
+def read_csv(path, bin_min, rows, data_col, bin_col):
+    """Function to read data and bins of one sample from a separated values file (.csv), as read_text; the delimiter is chosen from the anchor row, as exports are often separated by semicolons."""
+    return read_text(path, bin_min, rows, data_col, bin_col)
+
+
+def read_tsv(path, bin_min, rows, data_col, bin_col):
+    """Function to read data and bins of one sample from a tab separated values file (.tsv or .tab), as read_text."""
+    return read_text(path, bin_min, rows, data_col, bin_col, delimiter='\t')
+
+
+# readers of file extensions
+_READERS = {
+    '.xlsx': read_excel,
+    '.xls': read_excel,
+    '.csv': read_csv,
+    '.tsv': read_tsv,
+    '.tab': read_tsv,
+    '.txt': read_text,
+}
+
+
+def register_reader(ext, reader):
+    """
+    Function to add or replace the reader of a file extension, e.g. for exports of other instruments.
+
+    Parameters
+    ----------
+    ext : string
+        file extension, e.g. '.dat'
+    reader : function
+        function of path, bin_min, rows, data_col, and bin_col, returning arrays of data and bins from the anchor row in file order, as read_excel.
+
+    Returns
+    -------
+    None.
+
+    """
+    _READERS[ext.lower()] = reader
+
+
+def _full(col, rows):
+    """Hidden function to pad data or bins to rows with NaN, and reverse from coarse to fine."""
+    full = np.full(rows, np.nan)
+    full[:len(col)] = col[:rows]
+
+    return full[::-1]
+
+
+def _grid(path, bin_min):
+    """Hidden function to read all cells of the first sheet of a workbook, or of a delimited text file, as a dataframe without header."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xls'):
+        return pd.read_excel(path, header=None)
+
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    delimiter = '\t' if ext in ('.tsv', '.tab') else _delimiter(text, bin_min, path)
+
+    return pd.DataFrame(list(csv.reader(text.splitlines(), delimiter=delimiter)))
+
+
+def _read_columns(path, bin_min, rows, bin_col):
+    """Hidden function to read every data column of a file as a sample, named by the nearest text cell above the anchor row; returns names, samples-by-rows data, and bins in file order."""
+    file = _grid(path, bin_min)
+    cells = file.map(_to_float).to_numpy(dtype=float)
+    anchor = np.flatnonzero(cells[:, bin_col] == bin_min)
+    if len(anchor) == 0:
+        raise _not_found(path, bin_min)
+    i = anchor[0]
+
+    block = cells[i:i + rows]
+    base = os.path.splitext(os.path.basename(path))[0]
+    names, data = [], []
+    for col in range(block.shape[1]):
+        if col == bin_col or np.isnan(block[:, col]).all():
+            continue
+        header = [v for v in file.iloc[:i, col] if isinstance(v, str) and v.strip() != ''
+                  and np.isnan(_to_float(v))]
+        names.append(header[-1].strip() if header else '{}_{}'.format(base, col))
+        data.append(block[:, col])
+
+    return names, np.array(data).reshape(-1, len(block)), block[:, bin_col]
+
+
+def _read_sheets(path, bin_min, rows, data_col, bin_col):
+    """Hidden function to read every sheet of a workbook containing the smallest bin as a sample, named by sheet name; returns names, samples-by-rows data, and bins in file order."""
+    names, data, bins = [], [], None
+    for sheet, file in pd.read_excel(path, header=None, sheet_name=None).items():
+        if not (file == bin_min).any().any():
+            continue
+        col, b = _read_frame(file, bin_min, rows, data_col, bin_col, path)
+        names.append(str(sheet))
+        data.append(_full(col, rows))
+        if bins is None:
+            bins = b
+    if bins is None:
+        raise _not_found(path, bin_min)
+
+    # padded and reversed already, so return in file order
+    return names, np.array(data)[:, ::-1], bins
+
+
+def read_samples(path, bin_min=0.375198, rows=93, data_col=1, bin_col=0, layout=None):
+    """
+    Function to read data of all samples of one file in one parse: one sample per file, one sample per column, or one sample per sheet.
+
+    Parameters
+    ----------
+    path : string
+        path of file
+    bin_min : integer or float, optional
+        value of smallest grain size bin in microns, marking the anchor row. The default is 0.375198.
+    rows : integer, optional
+        number of rows containing data and bin sizes. The default is 93.
+    data_col : integer, optional
+        vertical column number containing data; used for one sample per file or per sheet. The default is 1.
+    bin_col : integer, optional
+        vertical column number containing bin sizes. The default is 0.
+    layout : string, optional
+        'columns' for every column other than bin_col containing data as a sample, named by the nearest text cell above the anchor row; 'sheets' for every sheet of a workbook as a sample, named by sheet name. The default is None (one sample per file, named by file basename).
+
+    Returns
+    -------
+    names : list
+        sample names
+    data : numpy array
+        samples-by-rows array of data, reversed from coarse to fine; rows missing at the end of the file are NaN.
+    bins : numpy array
+        bins of rows, reversed from coarse to fine; rows missing at the end of the file are NaN.
+
+    """
+    if layout is None or (layout == 'sheets' and
+                          os.path.splitext(path)[1].lower() not in ('.xlsx', '.xls')):
+        data, bins = read_sample(path, bin_min, rows, data_col, bin_col)
+        return [os.path.splitext(os.path.basename(path))[0]], data[np.newaxis], bins
+    elif layout == 'columns':
+        names, data, bins = _read_columns(path, bin_min, rows, bin_col)
+    elif layout == 'sheets':
+        names, data, bins = _read_sheets(path, bin_min, rows, data_col, bin_col)
+    else:
+        raise ValueError("layout must be None, 'columns', or 'sheets'")
+
+    data = np.array([_full(col, rows) for col in data]).reshape(-1, rows)
+
+    return names, data, _full(bins, rows)
+
+
+def read_sample(path, bin_min=0.375198, rows=93, data_col=1, bin_col=0):
+    """
+    Function to read data and bins of one sample with the reader of its file extension.
+
+    Parameters
+    ----------
+    path : string
+        path of file
+    bin_min : integer or float, optional
+        value of smallest grain size bin in microns, marking the anchor row. The default is 0.375198.
+    rows : integer, optional
+        number of rows containing data and bin sizes. The default is 93.
+    data_col : integer, optional
+        vertical column number containing data. The default is 1.
+    bin_col : integer, optional
+        vertical column number containing bin sizes. The default is 0.
+
+    Returns
+    -------
+    data : numpy array
+        data of rows, reversed from coarse to fine; rows missing at the end of the file are NaN.
+    bins : numpy array
+        bins of rows, reversed from coarse to fine; rows missing at the end of the file are NaN.
+
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in _READERS:
+        raise ValueError('No reader for {} files; use register_reader'.format(ext))
+
+    return tuple(_full(col, rows) for col in _READERS[ext](path, bin_min, rows, data_col, bin_col))
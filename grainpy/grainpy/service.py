@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains a small local HTTP service returning GrainPy statistics as JSON. Worker processes stay running between requests with GrainPy imported and compiled data cached, so that each request does not pay for interpreter startup, imports, and reading files again.
+
+
+--------------------------------------
+Copyright 2021-2022 Matthew A. Massey
+
+This file is part of GrainPy.
+
+GrainPy is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version. GrainPy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with GrainPy. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+__all__ = [
+    "StatsService",
+    "serve",
+]
+
+
+import os
+import json
+import importlib
+import time
+import base64
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+
+# number of GrainSizeDist objects cached by each worker process
+_DATASETS = 8
+
+# number of request latencies kept for metrics
+_LATENCIES = 1000
+
+# GrainSizeDist objects cached in each worker process
+_datasets = OrderedDict()
+
+
+def _warm():
+    """Hidden function to import GrainPy and plotting in a new worker process."""
+    import matplotlib
+    matplotlib.use('Agg')
+    importlib.import_module('.grainsize', __package__)
+
+
+def _dataset(paths, cache=True):
+    """Hidden function to collect a cached GrainSizeDist object of paths in a worker process; objects are cached until files change. Without cache, e.g. for uploads deleted after the request, a new object is returned and nothing is cached."""
+    from .grainsize import GrainSizeDist
+
+    if not cache:
+        return GrainSizeDist(list(paths))
+
+    key = tuple((p, os.path.getsize(p), os.path.getmtime(p)) for p in paths)
+    if key in _datasets:
+        _datasets.move_to_end(key)
+    else:
+        _datasets[key] = GrainSizeDist(list(paths))
+        while len(_datasets) > _DATASETS:
+            _datasets.popitem(last=False)
+
+    return _datasets[key]
+
+
+def _datast_job(paths, prom, plot, cache=True):
+    """
+    Hidden function run in a worker process to calculate statistics of paths, and optionally plot grain size distributions of all samples; the GrainSizeDist object of paths is cached for later requests if cache is True.
+
+    Returns
+    -------
+    result : dictionary
+        statistics of each sample, and base64-encoded PNG plots of each sample if plot is True
+
+    """
+    from .grainsize import _render
+
+    gsd = _dataset(paths, cache)
+    st = gsd.datast(prom)
+
+    # JSON-compatible statistics, missing values as null
+    result = {'statistics': {}}
+    for sample, contents in st.items():
+        result['statistics'][sample] = {
+            k: (None if v is None or (isinstance(v, float) and np.isnan(v))
+                else (float(v) if isinstance(v, (float, np.floating)) else v))
+            for k, v in contents.items()}
+
+    if plot:
+        bins = gsd.bins()
+        data = gsd.data().iloc[:, :-1]
+        cp = gsd.datacp().iloc[:, :-1]
+        result['plots'] = {}
+        for sample in gsd.samplenames():
+            fig = gsd._gsd_single_plot(sample, bins, data, cp, st.iloc[:, :-1])
+            png = _render(fig, 'png', dpi=100)
+            result['plots'][sample] = base64.b64encode(png).decode('ascii')
+
+    return result
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Hidden class handling requests of StatsService."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code, body):
+        out = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/metrics':
+            self._reply(200, self.server.service.metrics())
+        elif url.path == '/health':
+            self._reply(200, {'status': 'ok'})
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/datast':
+            self._reply(404, {'error': 'not found'})
+            return
+
+        query = parse_qs(url.query)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        tmpdir = None
+
+        try:
+            # JSON list of paths, or upload of one workbook
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                request = json.loads(body or b'{}')
+                paths = request['paths']
+                prom = float(request.get('prom', 0.1))
+                plot = bool(request.get('plot', False))
+            else:
+                name = os.path.basename(query.get('name', ['upload.xlsx'])[0])
+                tmpdir = tempfile.mkdtemp(prefix='grainpy_')
+                paths = [os.path.join(tmpdir, name)]
+                with open(paths[0], 'wb') as f:
+                    f.write(body)
+                prom = float(query.get('prom', [0.1])[0])
+                plot = query.get('plot', ['0'])[0].lower() in ('1', 'true', 'yes')
+
+            # uploads are deleted after the request, so are not cached
+            result = self.server.service.submit(paths, prom, plot, cache=tmpdir is None)
+            self._reply(200, result)
+
+        except Exception as e:
+            self._reply(400, {'error': '{}: {}'.format(type(e).__name__, e)})
+
+        finally:
+            if tmpdir is not None:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+class StatsService():
+    """
+    Class for a local HTTP service returning statistics of grain size data as JSON, calculated by worker processes that stay running between requests.
+
+    Requests
+    --------
+    POST /datast
+        JSON body {"paths": [...], "prom": 0.1, "plot": false}, or an uploaded workbook as the body with query parameters name, prom, and plot. Returns statistics of each sample as datast(), and base64-encoded PNG plots of each sample as gsd_single() if plot is true.
+    GET /metrics
+        Returns number of requests, queue depth, and request latencies.
+    GET /health
+        Returns {"status": "ok"}.
+
+    Parameters
+    ----------
+    host : string, optional
+        host address; the service is meant for the local machine only. The default is '127.0.0.1'.
+    port : integer, optional
+        port number; 0 selects a free port. The default is 8000.
+    workers : integer, optional
+        number of worker processes. The default is 2.
+
+    """
+
+    def __init__(self, host='127.0.0.1', port=8000, workers=2):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self._pool = None
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._requests = 0
+        self._errors = 0
+        self._latencies = deque(maxlen=_LATENCIES)
+
+    def start(self):
+        """
+        Starts worker processes and serves requests in a background thread.
+
+        Returns
+        -------
+        url : string
+            address of the service
+        """
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm)
+
+        # start all workers now, so that first requests are warm
+        for f in [self._pool.submit(_warm) for x in range(self.workers)]:
+            f.result()
+
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.service = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return 'http://{}:{}'.format(self.host, self.port)
+
+    def stop(self):
+        """
+        Stops serving requests and worker processes.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def submit(self, paths, prom=0.1, plot=False, cache=True):
+        """
+        Calculates statistics of paths in a worker process, recording queue depth and latency.
+
+        Parameters
+        ----------
+        paths : list
+            paths of grain size data files
+        prom : integer or float, optional
+            Peak prominence used for collecting significant modes in multimodal samples. The default is 0.1.
+        plot : Bool, optional
+            Option to include PNG plots of each sample. The default is False.
+        cache : Bool, optional
+            Option to keep data of paths cached in the worker process for later requests. The default is True.
+
+        Returns
+        -------
+        result : dictionary
+            statistics of each sample, and plots if plot is True.
+
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+        try:
+            result = self._pool.submit(_datast_job, list(paths), prom, plot, cache).result()
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._queued -= 1
+                self._requests += 1
+                self._latencies.append(time.perf_counter() - start)
+
+        return result
+
+    def metrics(self):
+        """
+        Collects metrics of requests served.
+
+        Returns
+        -------
+        metrics : dictionary
+            number of requests and errors, requests currently queued or running (queue_depth), number of workers, and mean, median, 95th percentile, and maximum latency of recent requests in milliseconds.
+
+        """
+        with self._lock:
+            lat = np.array(self._latencies) * 1000
+            metrics = {'requests': self._requests, 'errors': self._errors,
+                       'queue_depth': self._queued, 'workers': self.workers}
+
+        if len(lat) > 0:
+            metrics['latency_ms'] = {'mean': float(lat.mean()),
+                                     'p50': float(np.percentile(lat, 50)),
+                                     'p95': float(np.percentile(lat, 95)),
+                                     'max': float(lat.max())}
+        else:
+            metrics['latency_ms'] = {}
+
+        return metrics
+
+
+def serve(host='127.0.0.1', port=8000, workers=2):
+    """
+    Function to run StatsService until interrupted.
+
+    Parameters
+    ----------
+    host : string, optional
+        host address. The default is '127.0.0.1'.
+    port : integer, optional
+        port number. The default is 8000.
+    workers : integer, optional
+        number of worker processes. The default is 2.
+
+    Returns
+    -------
+    None.
+
+    """
+    service = StatsService(host, port, workers)
+    print('Serving GrainPy statistics at {}'.format(service.start()))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
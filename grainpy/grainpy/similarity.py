@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains a nearest-neighbour index for finding the most similar grain size distributions among compiled samples, e.g. for provenance and quality control.
+
+
+--------------------------------------
+Copyright 2021-2022 Matthew A. Massey
+
+This file is part of GrainPy.
+
+GrainPy is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version. GrainPy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with GrainPy. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+__all__ = [
+    "SimilarityIndex",
+    "load_index",
+]
+
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from .grainsize import _interp_cp
+
+
+# percentiles used for percentile feature vectors
+_PERCENTILES = np.arange(5, 100, 5)
+
+
+class SimilarityIndex():
+    """
+    Class for a nearest-neighbour index of grain size distributions. Distributions are indexed as feature vectors in k-d trees; samples added later are indexed in new trees, which are merged with rebuild().
+
+    Parameters
+    ----------
+    microns : numpy array or list
+        lower bin thresholds in microns, ordered from coarse to fine as GrainSizeDist.bins()
+    metric : string, optional
+        distance between distributions: 'wasserstein' (area between cumulative curves, in phi units), 'l1', or 'l2'. The default is 'wasserstein'.
+    features : string, optional
+        feature vectors for 'l1' and 'l2' metrics: 'cumulative' (cumulative percentages) or 'percentiles' (phi at percentiles 5 to 95). The default is 'cumulative'.
+
+    """
+
+    def __init__(self, microns, metric='wasserstein', features='cumulative'):
+        if metric not in ('wasserstein', 'l1', 'l2'):
+            raise ValueError("metric must be 'wasserstein', 'l1', or 'l2'")
+        if features not in ('cumulative', 'percentiles'):
+            raise ValueError("features must be 'cumulative' or 'percentiles'")
+
+        self.microns = np.asarray(microns, dtype=float)
+        self.metric = metric
+        self.features = features
+        self._trees = []
+        self._names = []
+
+    def _phi(self):
+        """Hidden method returning bins in phi units."""
+        return -1 * np.log2(self.microns / 1000)
+
+    def _vectors(self, values):
+        """Hidden method to convert a samples-by-bins array of grain size data to feature vectors."""
+        values = np.asarray(values, dtype=float)
+        if values.shape[1] != len(self.microns):
+            raise ValueError('Data have {} bins, but index has {} bins'.format(
+                values.shape[1], len(self.microns)))
+        cp = values.cumsum(axis=1)
+        phi = self._phi()
+
+        # L1 distance of cumulative fractions weighted by bin width is Wasserstein distance
+        if self.metric == 'wasserstein':
+            width = np.append(np.diff(phi), 0)
+            return cp / 100 * width
+        elif self.features == 'percentiles':
+            return _interp_cp(_PERCENTILES, cp, phi)
+        else:
+            return cp
+
+    def _blocks(self, data):
+        """Hidden method to collect names and feature vectors from a GrainSizeDist object in blocks of samples, or from a samples-by-bins array or dataframe with samples as rows."""
+        if hasattr(data, '_compiled'):
+            compiled = data._compiled()
+            for start, block in compiled.blocks():
+                names = compiled.names[start:start + len(block)]
+                yield list(names), self._vectors(block)
+        elif isinstance(data, pd.DataFrame):
+            yield list(data.index), self._vectors(data.to_numpy())
+        else:
+            values = np.atleast_2d(data)
+            yield list(range(len(values))), self._vectors(values)
+
+    def add(self, data):
+        """
+        Adds samples to index, without rebuilding samples already indexed.
+
+        Parameters
+        ----------
+        data : GrainSizeDist object, Dataframe, or numpy array
+            GrainSizeDist object, or samples-by-bins data with sample names as Dataframe index.
+
+        Returns
+        -------
+        None.
+
+        """
+        names, vectors = [], []
+        for n, v in self._blocks(data):
+            names += n
+            vectors.append(v)
+        if len(names) > 0:
+            self._trees.append(cKDTree(np.vstack(vectors)))
+            self._names.append(np.array(names, dtype=object))
+
+    def rebuild(self):
+        """
+        Merges all samples added to index into one tree, for faster queries.
+
+        Returns
+        -------
+        None.
+
+        """
+        if len(self._trees) > 1:
+            self._trees = [cKDTree(np.vstack([t.data for t in self._trees]))]
+            self._names = [np.concatenate(self._names)]
+
+    def __len__(self):
+        return sum(len(n) for n in self._names)
+
+    def query(self, data, k=5):
+        """
+        Finds the k indexed samples most similar to each sample of data.
+
+        Parameters
+        ----------
+        data : GrainSizeDist object, Dataframe, or numpy array
+            GrainSizeDist object, or samples-by-bins data with sample names as Dataframe index.
+        k : integer, optional
+            number of most similar samples. The default is 5.
+
+        Returns
+        -------
+        matches : Dataframe
+            Dataframe of k most similar indexed samples ('match') and their distances ('distance') ranked for each sample of data ('sample').
+
+        """
+        if len(self) == 0:
+            raise ValueError('Index is empty; add samples before querying')
+
+        p = 2 if self.metric == 'l2' else 1
+        k = min(k, len(self))
+        frames = []
+
+        for names, vectors in self._blocks(data):
+            dist, match = [], []
+            for tree, indexed in zip(self._trees, self._names):
+                kk = min(k, tree.n)
+                d, i = tree.query(vectors, k=kk, p=p)
+                dist.append(d.reshape(len(vectors), kk))
+                match.append(indexed[i.reshape(len(vectors), kk)])
+
+            # merge k nearest of all trees
+            dist = np.hstack(dist)
+            match = np.hstack(match)
+            order = np.argsort(dist, axis=1, kind='stable')[:, :k]
+            dist = np.take_along_axis(dist, order, axis=1)
+            match = np.take_along_axis(match, order, axis=1)
+
+            frames.append(pd.DataFrame({'sample': np.repeat(np.array(names, dtype=object), k),
+                                        'rank': np.tile(np.arange(1, k + 1), len(names)),
+                                        'match': match.ravel(),
+                                        'distance': dist.ravel()}))
+
+        return pd.concat(frames, ignore_index=True)
+
+    def save(self, filename):
+        """
+        Saves index to a .npz file, to be opened with load_index.
+
+        Parameters
+        ----------
+        filename : string
+            path of saved file
+
+        Returns
+        -------
+        None.
+
+        """
+        self.rebuild()
+        vectors = self._trees[0].data if self._trees else np.zeros((0, 0))
+        names = self._names[0] if self._names else np.array([], dtype=object)
+        np.savez(filename, microns=self.microns, metric=self.metric, features=self.features,
+                 vectors=vectors, names=np.array(names, dtype=str))
+
+
+def load_index(filename):
+    """
+    Function to open an index saved with SimilarityIndex.save.
+
+    Parameters
+    ----------
+    filename : string
+        path of saved .npz file
+
+    Returns
+    -------
+    index : SimilarityIndex object
+        Saved index.
+
+    """
+    with np.load(filename) as f:
+        index = SimilarityIndex(f['microns'], str(f['metric']), str(f['features']))
+        if len(f['names']) > 0:
+            index._trees.append(cKDTree(f['vectors']))
+            index._names.append(f['names'].astype(object))
+
+    return index
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains Monte Carlo estimates of the uncertainty of grain size statistics from the measurement uncertainty of each bin. Every sample is perturbed many times, and statistics and classes of all realizations are calculated together in blocks of one array, of several samples or of part of the realizations of one sample.
+
+
+--------------------------------------
+Copyright 2021-2022 Matthew A. Massey
+
+This file is part of GrainPy.
+
+GrainPy is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version. GrainPy is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with GrainPy. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+__all__ = [
+    "Uncertainty",
+    "uncertainty",
+]
+
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .grainsize import _interp_cp, _pchip_cp, _pchip_slopes, _folk, _ssc, _FOLK_PERCENTILES
+from .classify import (_wentworth_cat, _folk_sed_cat, _folk_sort_cat, _folk_skew_cat,
+                       _folk_kurt_cat)
+
+
+# default largest size of realizations held in memory at once, in bytes
+_MAX_BYTES = 2 ** 28
+
+# arrays of realizations' size held at once while calculating statistics
+_ARRAYS = 6
+
+
+class Uncertainty():
+    """
+    Class for results of Monte Carlo uncertainty of grain size statistics. Statistics are calculated for every realization of every sample, and summarized per sample.
+
+    Parameters
+    ----------
+    mean : Dataframe
+        Dataframe of means of statistics of realizations, with samples as rows and statistics as columns: Folk and Ward (1957) percentiles in phi units ('phi5' to 'phi95'), 'sand', 'silt', 'clay', 'median', 'mean_folk', 'sorting_folk', 'skewness_folk', and 'kurtosis_folk'.
+    se : Dataframe
+        Dataframe of standard errors of statistics (standard deviations of realizations), as mean.
+    probabilities : dictionary
+        Dataframe of probabilities of classes for each class statistic of datast(typed=True) ('sediment_class', 'median_ww', 'mean_folk_ww', 'sorting_folk_class', 'skewness_folk_class', 'kurtosis_folk_class'), with samples as rows and classes as columns.
+    n_iter : integer
+        number of realizations of each sample
+
+    """
+
+    def __init__(self, mean, se, probabilities, n_iter):
+        self.mean = mean
+        self.se = se
+        self.probabilities = probabilities
+        self.n_iter = n_iter
+
+    def likeliest(self):
+        """
+        Collects the most probable class of each class statistic and its probability.
+
+        Returns
+        -------
+        classes : Dataframe
+            Dataframe of most probable classes and their probabilities ('_p'), with samples as rows.
+
+        """
+        cols = OrderedDict()
+        for key, prob in self.probabilities.items():
+            cols[key] = prob.idxmax(axis=1).where(prob.sum(axis=1) > 0)
+            cols[key + '_p'] = prob.max(axis=1)
+
+        return pd.DataFrame(cols)
+
+
+def _realize(values, sd, n_iter, rng):
+    """Hidden function to perturb every row of a samples-by-bins array n_iter times with normal errors of standard deviation sd in bins with data, then renormalize each realization to the total of its sample; returns a (samples * n_iter)-by-bins array with realizations of each sample consecutive."""
+    real = np.repeat(values, n_iter, axis=0)
+    sd = np.broadcast_to(sd, values.shape)
+    real += rng.standard_normal(real.shape) * np.repeat(sd * (values > 0), n_iter, axis=0)
+    np.maximum(real, 0, out=real)
+
+    total = real.sum(axis=1)
+    scale = np.divide(np.repeat(values.sum(axis=1), n_iter), total,
+                      out=np.zeros_like(total), where=total > 0)
+    real *= scale[:, np.newaxis]
+
+    return real
+
+
+def _mc_stats(values, phi, interp):
+    """Hidden function to calculate percentiles, Folk and Ward statistics, and sand, silt, and clay of all rows of a samples-by-bins array, as _stats without modes."""
+    cp = values.cumsum(axis=1)
+    slopes = _pchip_slopes(cp, phi) if interp == 'pchip' else None
+    if slopes is None:
+        pct = _interp_cp(_FOLK_PERCENTILES, cp, phi)
+    else:
+        pct = _pchip_cp(_FOLK_PERCENTILES, cp, phi, slopes)
+    mean, sort, skew, kurt = _folk(pct)
+    s, m, c = _ssc(cp, phi, slopes)
+
+    st = OrderedDict(('phi' + str(q), pct[:, x]) for x, q in enumerate(_FOLK_PERCENTILES))
+    st.update([('sand', s), ('silt', m), ('clay', c), ('median', pct[:, 3]),
+               ('mean_folk', mean), ('sorting_folk', sort), ('skewness_folk', skew),
+               ('kurtosis_folk', kurt)])
+
+    return st
+
+
+def _mc_classes(st):
+    """Hidden function to classify statistics from _mc_stats as datast(typed=True), returning pandas Categoricals."""
+    return OrderedDict([
+        ('sediment_class', _folk_sed_cat(st['sand'], st['silt'], st['clay'])),
+        ('median_ww', _wentworth_cat(st['median'])),
+        ('mean_folk_ww', _wentworth_cat(st['mean_folk'])),
+        ('sorting_folk_class', _folk_sort_cat(st['sorting_folk'])),
+        ('skewness_folk_class', _folk_skew_cat(st['skewness_folk'])),
+        ('kurtosis_folk_class', _folk_kurt_cat(st['kurtosis_folk']))])
+
+
+def _combine(count, mean, m2, arr):
+    """Hidden function to add realizations arr (samples-by-realizations-by-statistics) to running counts, means, and sums of squared deviations of each sample (Chan et al., 1979); returns updated count, mean, and m2."""
+    k = arr.shape[1]
+    amean = arr.mean(axis=1)
+    am2 = ((arr - amean[:, np.newaxis]) ** 2).sum(axis=1)
+    delta = amean - mean
+    total = count + k
+
+    return total, mean + delta * k / total, m2 + am2 + delta ** 2 * count * k / total
+
+
+def uncertainty(gso, sd, n_iter=1000, relative=False, interp='linear', seed=None,
+                max_bytes=_MAX_BYTES):
+    """
+    Function to estimate uncertainty of grain size statistics of all samples of a GrainSizeDist object by Monte Carlo simulation. Each sample is perturbed n_iter times with normal errors of each bin containing data, renormalized to its total, and percentiles, Folk and Ward statistics, sand, silt, and clay, and their classes are calculated for all realizations. Realizations of as many samples as fit in max_bytes are calculated together as one array; if the realizations of one sample do not fit, they are calculated in parts, with running means, variances, and class counts.
+
+    Parameters
+    ----------
+    gso : class
+        Object of GrainSizeDist class.
+    sd : float or list
+        standard deviation of volume (%) of each bin, ordered as GrainSizeDist.bins(), or one value for all bins, e.g. per-bin uncertainty specified by the instrument vendor.
+    n_iter : integer, optional
+        number of realizations of each sample. The default is 1000.
+    relative : Bool, optional
+        Option to give sd as fractions of the volume of each bin of each sample (e.g. 0.05 for 5%), instead of volume (%). The default is False.
+    interp : string, optional
+        interpolation of cumulative percentages between bins, as datast(): 'linear' or 'pchip'. The default is 'linear'.
+    seed : integer, optional
+        seed of random errors, for repeatable results. The default is None.
+    max_bytes : integer, optional
+        largest size of realizations held in memory at once, in bytes. The default is 268435456 (256 MiB).
+
+    Returns
+    -------
+    result : Uncertainty object
+        Means and standard errors of statistics, and probabilities of classes, of each sample.
+
+    """
+    if interp not in ('linear', 'pchip'):
+        raise ValueError("interp must be 'linear' or 'pchip'")
+
+    compiled = gso._compiled()
+    phi = compiled.phi()
+    n, b = compiled.values.shape
+    sd = np.asarray(sd, dtype=float)
+    if sd.ndim == 1 and len(sd) != b:
+        raise ValueError('sd must have one value per bin')
+
+    # realizations fitting in max_bytes with working arrays, as samples and realizations of each
+    fit = max(1, int(max_bytes // (_ARRAYS * 8 * b)))
+    size = max(1, fit // n_iter)
+    iters = min(n_iter, fit)
+    rng = np.random.default_rng(seed)
+
+    means, ses, counts = [], [], OrderedDict()
+    for start in range(0, n, size):
+        values = np.asarray(compiled.values[start:start + size], dtype=float)
+        scale = sd * values if relative else sd
+
+        # running statistics and class counts over parts of the realizations
+        count, mean, m2, hits = 0, 0, 0, OrderedDict()
+        for done in range(0, n_iter, iters):
+            k = min(iters, n_iter - done)
+            real = _realize(values, scale, k, rng)
+
+            st = _mc_stats(real, phi, interp)
+            arr = np.stack(list(st.values()), axis=1).reshape(len(values), k, -1)
+            count, mean, m2 = _combine(count, mean, m2, arr)
+
+            # realizations in each class, from category codes
+            for key, cat in _mc_classes(st).items():
+                codes = cat.codes.reshape(len(values), k)
+                hit = (codes[:, :, np.newaxis] == np.arange(len(cat.categories))).sum(axis=1)
+                hits[key] = (cat.categories, hits[key][1] + hit if key in hits else hit)
+
+        means.append(mean)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ses.append(np.sqrt(m2 / (count - 1)))
+        for key, (cats, hit) in hits.items():
+            counts.setdefault(key, (cats, []))[1].append(hit / count)
+
+    names = compiled.names
+    columns = list(st.keys())
+    mean = pd.DataFrame(np.concatenate(means), index=names, columns=columns)
+    se = pd.DataFrame(np.concatenate(ses), index=names, columns=columns)
+    probabilities = OrderedDict(
+        (key, pd.DataFrame(np.concatenate(frac), index=names, columns=list(cats)))
+        for key, (cats, frac) in counts.items())
+
+    return Uncertainty(mean, se, probabilities, n_iter)
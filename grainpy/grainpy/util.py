@@ -31,7 +31,7 @@ from openpyxl import load_workbook
 
 def selectdata():
     """
-    Function to select .xlsx or .xls file(s) using file dialog window.
+    Function to select grain size data file(s) (.xlsx, .xls, .csv, .tsv, .tab, or .txt) using file dialog window.
 
     Returns
     -------
@@ -43,7 +43,7 @@ def selectdata():
     root = tk.Tk()
     root.withdraw()
     path = filedialog.askopenfilenames(title='Select files...', filetypes=(
-        [('Excel files', '*.xlsx *.xls')]))
+        [('Excel files', '*.xlsx *.xls'), ('Text files', '*.csv *.tsv *.tab *.txt')]))
     root.destroy()
 
     return list(path)
@@ -133,6 +133,25 @@ def datacheck(bin_min=0.375198, bin_rows=93, bin_col=0):
                 wb.save(error_path)
 
 
+def _savename():
+    """
+    Hidden function to select name and location of a .csv or .xlsx file to be saved using file dialog window.
+
+    Returns
+    -------
+    fs : string
+        File path selected by user.
+
+    """
+    root = tk.Tk()
+    root.withdraw()
+    fs = filedialog.asksaveasfilename(title='Save data frame...', filetypes=(
+        [('Comma Separated Values file', '*.csv'), ('Excel file', '*.xlsx')]), defaultextension='*.csv')
+    root.destroy()
+
+    return fs
+
+
 def df_ex(df):
     """
     Function to save dataframe as .csv or .xlsx file using file dialog window.
@@ -147,11 +166,7 @@ def df_ex(df):
     None.
 
     """
-    root = tk.Tk()
-    root.withdraw()
-    fs = filedialog.asksaveasfilename(title='Save data frame...', filetypes=(
-        [('Comma Separated Values file', '*.csv'), ('Excel file', '*.xlsx')]), defaultextension='*.csv')
-    root.destroy()
+    fs = _savename()
 
     if fs.endswith('.csv'):
         df.to_csv(fs)
@@ -161,7 +176,7 @@ def df_ex(df):
 
 def gems_ex(gso):
     """
-    Function to save an object of GrainSizeDist object as .csv or .xlsx file using file dialog window. Table consists of compiled data, sand/silt/clay relative proportions, and samplenames, all transposed horizontally. Works well with GIS databases.
+    Function to save an object of GrainSizeDist object as .csv or .xlsx file using file dialog window. Table consists of compiled data, sand/silt/clay relative proportions, and samplenames, all transposed horizontally. Works well with GIS databases. Tables saved as .csv are written in blocks of samples, so need not fit in memory.
 
     Parameters
     ----------
@@ -173,20 +188,10 @@ def gems_ex(gso):
     None.
 
     """
-    bins = gso.bins().drop(index=0)
-    data = gso.data().iloc[:, :-1].drop(index=0)
-    st = gso.datast()
-
-    # format bin titles
-    cols = ['Lower' + str(i).replace('.', 'p') for i in bins['microns']]
-    cols[0] = 'Upper2000' + cols[0]
-
-    # create df, modify for geodatabase format
-    df = pd.DataFrame(data, copy=True).T
-    df.columns = cols
-    df.index.name = 'SampleID'
-    df.insert(0, 'BCSand', st.loc['sand'])
-    df.insert(1, 'BCSilt', st.loc['silt'])
-    df.insert(2, 'BCClay', st.loc['clay'])
-
-    df_ex(df)
+    fs = _savename()
+
+    if fs.endswith('.csv'):
+        for x, df in enumerate(gso._gems_blocks()):
+            df.to_csv(fs, mode='w' if x == 0 else 'a', header=x == 0)
+    else:
+        pd.concat(gso._gems_blocks()).to_excel(fs)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# package sources live in grainpy/grainpy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'grainpy'))
@@ -0,0 +1,62 @@
+"""Tests of asyncio loading of `grainpy.grainsize`."""
+
+import os
+import glob
+import time
+import shutil
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import grainpy.grainsize
+from grainpy.grainsize import GrainSizeDist
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def paths(tmp_path):
+    sources = sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))
+    return [shutil.copy(sources[x % 3], str(tmp_path / 'R{:02d}.xlsx'.format(x))) for x in range(12)]
+
+
+def test_aload(paths, monkeypatch):
+    # count files parsed at the same time, with reads slow enough to overlap
+    lock = threading.Lock()
+    running, peak = [0], [0]
+    read_sample = grainpy.grainsize.read_sample
+
+    def slow(*args):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        try:
+            return read_sample(*args)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(grainpy.grainsize, 'read_sample', slow)
+    with ThreadPoolExecutor(8) as executor:
+        gsd = asyncio.run(GrainSizeDist.aload(paths, concurrency=3, executor=executor))
+
+    assert peak[0] == 3
+    expected = GrainSizeDist(paths)
+    assert gsd.samplenames() == expected.samplenames()
+    np.testing.assert_array_equal(gsd.datamatrix(), expected.datamatrix())
+
+
+def test_adatast(paths):
+    async def load():
+        gsd = await GrainSizeDist.aload(paths, lith='a')
+        return gsd, await gsd.adatast()
+
+    gsd, st = asyncio.run(load())
+    pd.testing.assert_frame_equal(st, GrainSizeDist(paths).datast())
+    assert list(gsd.metadata()['lith']) == ['a'] * len(paths)
@@ -0,0 +1,84 @@
+"""Tests of `grainpy.compare`."""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+from grainpy.compare import compare
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _copies(directory, source, names):
+    """Copies of one fixture workbook, one sample per name."""
+    directory.mkdir(exist_ok=True)
+    return [shutil.copy(os.path.join(DATA, source + '.xlsx'), str(directory / (name + '.xlsx')))
+            for name in names]
+
+
+@pytest.fixture
+def shifted(tmp_path):
+    a = _copies(tmp_path / 'a', 'S000', ['A' + str(x) for x in range(6)])
+    b = _copies(tmp_path / 'b', 'S002', ['B' + str(x) for x in range(6)])
+    return a, b
+
+
+def test_identical(tmp_path):
+    names = ['S000', 'S001', 'S002']
+    a = [_copies(tmp_path / 'a', n, [n])[0] for n in names]
+    b = [_copies(tmp_path / 'b', n, [n])[0] for n in names]
+
+    result = compare(GrainSizeDist(a), GrainSizeDist(b), n_perm=200, seed=0)
+    assert (result.n_a, result.n_b, result.n_perm) == (3, 3, 200)
+    np.testing.assert_allclose(result.bins['diff'], 0, atol=1e-12)
+    assert (result.bins['p_value'] == 1).all()
+    assert result.ks_p == 1
+    assert (result.stats['p_value'].dropna() == 1).all()
+
+
+def test_shifted(shifted):
+    a, b = shifted
+    result = compare(GrainSizeDist(a), GrainSizeDist(b), n_perm=2000, seed=0)
+
+    # only the observed split and its mirror separate the sets completely (2 of 924)
+    assert result.ks > 0
+    assert result.ks_p < 0.01
+    assert result.stats.loc['mean_folk', 'p_value'] < 0.01
+    assert result.bins['p_value'].min() < 0.01
+
+
+def test_pvalue_floor(shifted):
+    a, b = shifted
+    n_perm = 19
+    result = compare(GrainSizeDist(a), GrainSizeDist(b), n_perm=n_perm, seed=1)
+
+    # p-values are (exceed + 1) / (n_perm + 1), never below 1 / (n_perm + 1)
+    p = np.concatenate([result.bins['p_value'], result.stats['p_value'].dropna(), [result.ks_p]])
+    assert (p >= 1 / (n_perm + 1)).all()
+    np.testing.assert_allclose(p * (n_perm + 1), np.round(p * (n_perm + 1)))
+    assert result.ks_p == pytest.approx(1 / (n_perm + 1))
+
+
+def test_seed(shifted):
+    a, b = shifted
+    first = compare(GrainSizeDist(a), GrainSizeDist(b), n_perm=100, seed=3)
+    second = compare(GrainSizeDist(a), GrainSizeDist(b), n_perm=100, seed=3)
+    assert first.bins.equals(second.bins)
+    assert first.stats.equals(second.stats)
+
+
+def test_groups(shifted):
+    a, b = shifted
+    gsd = GrainSizeDist(a + b, lith=['sand'] * len(a) + ['silt'] * len(b))
+    groups = gsd.groupby('lith')
+    result = groups.compare('sand', 'silt', n_perm=500, seed=0)
+
+    direct = compare(GrainSizeDist(a), GrainSizeDist(b), n_perm=500, seed=0)
+    assert (result.n_a, result.n_b) == (6, 6)
+    assert result.ks == pytest.approx(direct.ks)
+    np.testing.assert_allclose(result.bins['p_value'], direct.bins['p_value'])
+    assert result.ks_p == direct.ks_p
@@ -0,0 +1,74 @@
+"""Tests of `grainpy.mixing`."""
+
+import os
+import glob
+
+import numpy as np
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+from grainpy.mixing import emma, emma_curve, EndMemberModel
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture(scope='module')
+def mixtures(tmp_path_factory):
+    """Text files of samples mixed from three known end-members, and their abundances."""
+    microns = GrainSizeDist(sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))).bins()['microns']
+    microns = microns.to_numpy()[::-1]
+    x = np.arange(len(microns))
+    members = np.array([np.exp(-0.5 * ((x - c) / 6) ** 2) for c in (20, 45, 70)])
+    members *= 100 / members.sum(axis=1, keepdims=True)
+
+    rng = np.random.default_rng(0)
+    # pure end-members among samples, so that end-members are identifiable
+    abundances = np.vstack([np.eye(3), rng.dirichlet(np.ones(3), size=27)])
+    directory = tmp_path_factory.mktemp('mixtures')
+    paths = []
+    for k, row in enumerate(abundances @ members):
+        path = directory / 'M{:02d}.txt'.format(k)
+        path.write_text('\n'.join('{}\t{}'.format(m, v) for m, v in zip(microns, row)) + '\n')
+        paths.append(str(path))
+
+    return GrainSizeDist(paths), members, abundances
+
+
+def test_emma(mixtures):
+    gsd, members, abundances = mixtures
+    model = emma(gsd, 3)
+
+    assert isinstance(model, EndMemberModel)
+    assert list(model.abundances.index) == gsd.samplenames()
+    assert (model.abundances.to_numpy() >= 0).all()
+    np.testing.assert_allclose(model.abundances.sum(axis=1), 100)
+    np.testing.assert_allclose(model.members.sum(axis=0), 100)
+    assert (model.members.to_numpy() >= 0).all()
+    assert model.r2 > 0.999
+    assert model.r2_samples.min() > 0.99
+
+    # fitted end-members match known end-members, in any order; bins are compiled from coarse to fine
+    fitted = model.members.to_numpy().T[:, ::-1]
+    dist = ((fitted[:, np.newaxis] - members) ** 2).sum(axis=2)
+    assert np.sort(dist.min(axis=1)).max() < 1e-2 * (members ** 2).sum(axis=1).min()
+
+
+def test_warm_start(mixtures):
+    gsd, members, abundances = mixtures
+    two = emma(gsd, 2)
+    three = emma(gsd, 3, init=two)
+
+    assert three.members.shape == (len(members.T), 3)
+    assert list(three.members.columns) == ['EM1', 'EM2', 'EM3']
+    np.testing.assert_allclose(three.abundances.sum(axis=1), 100)
+    assert three.r2 > two.r2
+
+
+def test_emma_curve(mixtures):
+    gsd, members, abundances = mixtures
+    models, fit = emma_curve(gsd, range(1, 4))
+    assert list(models) == [1, 2, 3]
+    assert list(fit.index) == [1, 2, 3]
+    assert (np.diff(fit['r2']) > 0).all()
+    assert fit.loc[3, 'r2'] > 0.999
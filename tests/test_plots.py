@@ -0,0 +1,139 @@
+"""Tests of plots and reports of `grainpy.grainsize`."""
+
+import os
+import re
+import glob
+import shutil
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.collections import PathCollection, PolyCollection
+from matplotlib.figure import Figure
+
+from grainpy.grainsize import GrainSizeDist
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return [shutil.copy(p, str(tmp_path)) for p in sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))]
+
+
+def _pages(filename):
+    with open(filename, 'rb') as f:
+        return len(re.findall(rb'/Type\s*/Page\b(?!s)', f.read()))
+
+
+def test_report_pages(paths, tmp_path):
+    gsd = GrainSizeDist(paths)
+    filename = gsd.report(str(tmp_path / 'report.pdf'))
+
+    # mean plot, ternary diagram, one table page, and one plot of each sample
+    assert filename == str(tmp_path / 'report.pdf')
+    assert _pages(filename) == 3 + len(gsd.samplenames())
+
+    filename = gsd.report(str(tmp_path / 'single.pdf'), multi=False, ternary=False, table=False)
+    assert _pages(filename) == len(gsd.samplenames())
+
+
+def test_gsd_profile(paths, tmp_path):
+    gsd = GrainSizeDist(paths)
+    before = sorted(os.listdir(str(tmp_path)))
+
+    fig = gsd.gsd_profile([3.0, 1.0, 2.0], window=1, save=False, show=False)
+    assert len(fig.axes) == 3
+    assert fig.axes[0].get_ylim() == (3.0, 1.0)
+
+    png = gsd.gsd_profile([3.0, 1.0, 2.0], window=3, save=False, fmt='png', show=False)
+    assert png.startswith(b'\x89PNG')
+    assert sorted(os.listdir(str(tmp_path))) == before
+
+    gsd.gsd_profile([3.0, 1.0, 2.0], save=True, show=False)
+    assert sorted(set(os.listdir(str(tmp_path))) - set(before)) == ['Profile.jpg', 'Profile.pdf']
+
+
+def test_ternary(paths, tmp_path):
+    gsd = GrainSizeDist(paths)
+    before = sorted(os.listdir(str(tmp_path)))
+
+    # samples as points at their sand, silt, and clay proportions
+    fig = gsd.ternary(save=False, show=False)
+    ax = fig.axes[0]
+    points = [c for c in ax.collections if isinstance(c, PathCollection)]
+    assert len(fig.axes) == 1 and len(points) == 1
+    stats = gsd.datast()[gsd.samplenames()]
+    sand, silt = (stats.loc[col].to_numpy(dtype=float) / 100 for col in ('sand', 'silt'))
+    np.testing.assert_allclose(points[0].get_offsets(),
+                               np.column_stack([silt + sand / 2, sand * np.sqrt(3) / 2]), atol=1e-9)
+
+    # shaded by number of samples, with a colour bar, beyond density samples
+    fig = gsd.ternary(density=2, save=False, show=False)
+    assert len(fig.axes) == 2
+    assert any(isinstance(c, PolyCollection) for c in fig.axes[0].collections)
+    assert not any(isinstance(c, PathCollection) for c in fig.axes[0].collections)
+
+    png = gsd.ternary(save=False, fmt='png', show=False)
+    assert png.startswith(b'\x89PNG')
+    assert sorted(os.listdir(str(tmp_path))) == before
+
+    gsd.ternary(save=True, show=False)
+    assert sorted(set(os.listdir(str(tmp_path))) - set(before)) == ['Ternary.jpg', 'Ternary.pdf']
+
+
+def test_gsd_single(paths, tmp_path):
+    gsd = GrainSizeDist(paths)
+    before = sorted(os.listdir(str(tmp_path)))
+
+    figs = gsd.gsd_single(save=False, show=False)
+    assert list(figs) == gsd.samplenames()
+    assert all(isinstance(fig, Figure) for fig in figs.values())
+    assert list(gsd.gsd_single(files=['S001'], save=False, show=False)) == ['S001']
+    assert list(gsd.gsd_single(i=1, j=3, save=False, show=False)) == ['S001', 'S002']
+
+    pngs = gsd.gsd_single(files=['S000', 'S002'], save=False, fmt='png', show=False)
+    assert list(pngs) == ['S000', 'S002']
+    assert all(png.startswith(b'\x89PNG') for png in pngs.values())
+    assert sorted(os.listdir(str(tmp_path))) == before
+
+    # plots named by sample, next to their files
+    gsd.gsd_single(files=['S000'], save=True, show=False)
+    assert sorted(set(os.listdir(str(tmp_path))) - set(before)) == ['S000.jpg', 'S000.pdf']
+
+
+def test_gsd_multi(paths, tmp_path):
+    gsd = GrainSizeDist(paths)
+    before = sorted(os.listdir(str(tmp_path)))
+
+    assert isinstance(gsd.gsd_multi(save=False, show=False), Figure)
+    assert gsd.gsd_multi(bplt=True, save=False, fmt='png', show=False).startswith(b'\x89PNG')
+    assert gsd.gsd_multi(save=False, fmt='pdf', show=False).startswith(b'%PDF')
+    assert sorted(os.listdir(str(tmp_path))) == before
+
+    gsd.gsd_multi(save=True, show=False)
+    assert sorted(set(os.listdir(str(tmp_path))) - set(before)) == ['MeanGSD.jpg', 'MeanGSD.pdf']
+
+
+@pytest.mark.parametrize('backend, show, shown', [('agg', None, False), ('qtagg', None, True),
+                                                  ('qtagg', False, False), ('agg', True, True)])
+def test_show(paths, monkeypatch, backend, show, shown):
+    gsd = GrainSizeDist(paths)
+    calls = []
+    monkeypatch.setattr(matplotlib, 'get_backend', lambda: backend)
+    monkeypatch.setattr(plt, 'show', lambda *args, **kwargs: calls.append(plt.get_fignums()))
+    figures = plt.get_fignums()
+
+    # shown plots are pyplot figures, closed once shown; others are kept out of pyplot
+    fig = gsd.gsd_multi(save=False, show=show)
+    assert isinstance(fig, Figure)
+    assert len(calls) == int(shown)
+    if shown:
+        assert len(calls[0]) == len(figures) + 1
+    assert plt.get_fignums() == figures
+
+    figs = gsd.gsd_single(save=False, show=show)
+    assert len(calls) == (1 + len(figs)) * int(shown)
+    assert plt.get_fignums() == figures
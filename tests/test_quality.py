@@ -0,0 +1,120 @@
+"""Tests of data checks of `grainpy.grainsize`."""
+
+import os
+import glob
+
+import numpy as np
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture(scope='module')
+def fixture():
+    """Bins from the smallest bin in file order, and coarse-to-fine data of the fixture workbooks."""
+    gsd = GrainSizeDist(sorted(glob.glob(os.path.join(DATA, 'S*.xlsx'))))
+    return gsd.bins()['microns'].to_numpy()[::-1], gsd.datamatrix()
+
+
+def _write(path, microns, values):
+    """Writes one sample of coarse-to-fine values as a text file; NaN values are left blank."""
+    cells = ['' if np.isnan(v) else repr(float(v)) for v in values[::-1]]
+    path.parent.mkdir(exist_ok=True)
+    path.write_text('\n'.join('{}\t{}'.format(m, c) for m, c in zip(microns, cells)) + '\n')
+    return str(path)
+
+
+def test_dataqc(fixture, tmp_path):
+    microns, values = fixture
+    good = values[0]
+    negative = good.copy()
+    negative[41] += negative[40] + 0.5
+    negative[40] = -0.5
+    missing = good.copy()
+    missing[1] = np.nan
+    truncated = good * 0.95
+    truncated[0] += 5
+
+    paths = [_write(tmp_path / 'good.txt', microns, good),
+             _write(tmp_path / 'total.txt', microns, good * 0.9),
+             _write(tmp_path / 'negative.txt', microns, negative),
+             _write(tmp_path / 'missing.txt', microns, missing),
+             _write(tmp_path / 'truncated.txt', microns, truncated),
+             _write(tmp_path / 'a' / 'twin.txt', microns, values[1]),
+             _write(tmp_path / 'b' / 'twin.txt', microns, values[1])]
+    gsd = GrainSizeDist(paths)
+    qc = gsd.dataqc()
+
+    checks = ['total_off', 'negative', 'missing', 'truncated', 'duplicate']
+    flags = qc[checks].to_numpy()
+    expected = np.zeros(flags.shape, dtype=bool)
+    expected[[1, 2, 3, 4, 5, 6], [0, 1, 2, 3, 4, 4]] = True
+    np.testing.assert_array_equal(flags, expected)
+    assert list(qc['flagged']) == [False] + [True] * 6
+    assert qc['total'].iloc[1] == pytest.approx(90)
+    assert list(qc['source']) == paths
+
+    # tolerances of totals and tails
+    assert not gsd.dataqc(tol=11)['total_off'].iloc[1]
+    assert not gsd.dataqc(tail=6)['truncated'].iloc[4]
+
+    passed = gsd.passed()
+    assert passed.samplenames() == ['good']
+    np.testing.assert_allclose(passed.datamatrix(), [good])
+
+
+def test_dataqc_fixture():
+    # finest bin of S002 holds 0.147% of volume
+    qc = GrainSizeDist(sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))).dataqc()
+    assert list(qc['truncated']) == [False, False, True]
+    assert not qc[['total_off', 'negative', 'missing', 'duplicate']].to_numpy().any()
+
+
+@pytest.fixture
+def mixtures(fixture, tmp_path):
+    """Samples mixed from the fixture samples, and one unusual sample with a coarse peak ('odd')."""
+    microns, values = fixture
+    rng = np.random.default_rng(0)
+    paths = []
+    mixed = (rng.dirichlet(20 * np.ones(3), size=60) @ values) * rng.lognormal(0, 0.2, (60, len(microns)))
+    for k, row in enumerate(100 * mixed / mixed.sum(axis=1, keepdims=True)):
+        paths.append(_write(tmp_path / 'M{:02d}.txt'.format(k), microns, row))
+
+    odd = np.exp(-0.5 * ((np.arange(len(microns)) - 12) / 3) ** 2)
+    paths.insert(17, _write(tmp_path / 'odd.txt', microns, 100 * odd / odd.sum()))
+
+    return GrainSizeDist(paths)
+
+
+def test_anomalies(mixtures):
+    scores = mixtures.anomalies()
+    assert list(scores.columns) == ['score', 'p_value', 'rank', 'flagged']
+    assert sorted(scores.index) == sorted(mixtures.samplenames())
+    assert (np.diff(scores['score']) <= 0).all()
+    assert list(scores['rank']) == list(range(1, len(scores) + 1))
+    assert ((scores['p_value'] >= 0) & (scores['p_value'] <= 1)).all()
+
+    # planted sample is by far the most unusual, and flagged
+    assert scores.index[0] == 'odd'
+    assert scores.loc['odd', 'flagged']
+    assert scores['score'].iloc[0] > 5 * scores['score'].iloc[1]
+    assert scores['flagged'].sum() < len(scores) // 4
+
+    alpha = 1e-6
+    flagged = mixtures.anomalies(alpha=alpha)['flagged']
+    assert flagged.equals(scores['p_value'] < alpha)
+    keep = [n for n in mixtures.samplenames() if not flagged[n]]
+    rows = [k for k, n in enumerate(mixtures.samplenames()) if not flagged[n]]
+    inliers = mixtures.inliers(alpha=alpha)
+    assert 'odd' not in keep
+    assert inliers.samplenames() == keep
+    np.testing.assert_allclose(inliers.datamatrix(), mixtures.datamatrix()[rows])
+
+
+def test_anomalies_few_samples():
+    gsd = GrainSizeDist(sorted(glob.glob(os.path.join(DATA, 'S*.xlsx'))))
+    with pytest.raises(ValueError, match='more samples'):
+        gsd.anomalies()
@@ -0,0 +1,99 @@
+"""Tests for `grainpy.readers`."""
+
+import os
+
+import numpy as np
+import pytest
+from openpyxl import Workbook
+
+from grainpy.grainsize import GrainSizeDist
+from grainpy.readers import read_sample, read_samples
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+BINS = [0.375198, 0.411574, 0.451477]
+
+
+def _write(path, header, delimiter):
+    lines = header + [delimiter.join([str(b), str(v), str(2 * v)]) for b, v in zip(BINS, (1, 2, 3))]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_delimiter_from_anchor_row(tmp_path):
+    path = _write(tmp_path / 'a.txt', ['# exported; instrument A', 'Channel,Volume'], ',')
+    data, bins = read_sample(path, rows=3)
+    np.testing.assert_allclose(data, [3, 2, 1])
+    np.testing.assert_allclose(bins, BINS[::-1])
+
+
+def test_columns_delimiter_from_anchor_row(tmp_path):
+    path = _write(tmp_path / 'b.csv', ['note; comma separated', 'Channel,A,B'], ',')
+    names, data, bins = read_samples(path, rows=3, layout='columns')
+    assert names == ['A', 'B']
+    np.testing.assert_allclose(data, [[3, 2, 1], [6, 4, 2]])
+
+
+def test_anchor_not_found(tmp_path):
+    path = _write(tmp_path / 'c.txt', ['Channel;Volume'], ';')
+    with pytest.raises(ValueError, match='c.txt'):
+        read_sample(path, bin_min=0.5, rows=3)
+
+
+@pytest.mark.parametrize('delimiter', [',', ';', '\t'])
+def test_csv_delimiter(tmp_path, delimiter):
+    path = _write(tmp_path / 'd.csv', ['Channel' + delimiter + 'Volume'], delimiter)
+    data, bins = read_sample(path, rows=3)
+    np.testing.assert_allclose(data, [3, 2, 1])
+    np.testing.assert_allclose(bins, BINS[::-1])
+
+
+def _microns():
+    """Bins of the fixture workbooks from the smallest bin, in file order."""
+    return GrainSizeDist([os.path.join(DATA, 'S000.xlsx')]).bins()['microns'].to_numpy()[::-1]
+
+
+def test_layouts(tmp_path):
+    microns = _microns()
+    rng = np.random.default_rng(0)
+    samples = {name: rng.random(len(microns)) for name in ('A', 'B', 'X', 'Y')}
+
+    # one sample per column, named by header
+    book = Workbook()
+    sheet = book.active
+    sheet.append(['Exported samples'])
+    sheet.append(['Size', 'A', 'B'])
+    for row in zip(microns, samples['A'], samples['B']):
+        sheet.append([float(v) for v in row])
+    columns = str(tmp_path / 'columns.xlsx')
+    book.save(columns)
+
+    # one sample per sheet, named by sheet
+    book = Workbook()
+    book.remove(book.active)
+    for name in ('X', 'Y'):
+        sheet = book.create_sheet(name)
+        sheet.append(['Size', 'Volume'])
+        for row in zip(microns, samples[name]):
+            sheet.append([float(v) for v in row])
+    book.create_sheet('Notes').append(['no data'])
+    sheets = str(tmp_path / 'sheets.xlsx')
+    book.save(sheets)
+
+    single = os.path.join(DATA, 'S000.xlsx')
+    gsd = GrainSizeDist([columns, sheets, single], lith=['a', 'b', 'c'], meta={'core': [1, 2, 3]},
+                        layout={columns: 'columns', sheets: 'sheets'})
+    assert gsd.samplenames() == ['A', 'B', 'X', 'Y', 'S000']
+
+    values = gsd.datamatrix()
+    for x, name in enumerate(['A', 'B', 'X', 'Y']):
+        np.testing.assert_allclose(values[x], samples[name][::-1])
+    np.testing.assert_allclose(values[4], GrainSizeDist([single]).datamatrix()[0])
+
+    # attributes of each path apply to all of its samples
+    meta = gsd.metadata()
+    assert list(meta.index) == gsd.samplenames()
+    assert list(meta['lith']) == ['a', 'a', 'b', 'b', 'c']
+    assert list(meta['core']) == [1, 1, 2, 2, 3]
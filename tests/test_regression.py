@@ -0,0 +1,127 @@
+"""Regression tests pinning outputs of `grainpy.grainsize` to values of the original implementation."""
+
+import os
+import glob
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _expected(name, **kwargs):
+    return pd.read_csv(os.path.join(DATA, 'expected_' + name + '.csv'), **kwargs)
+
+
+@pytest.fixture
+def paths():
+    return sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))
+
+
+def test_bins(paths):
+    bins = GrainSizeDist(paths).bins()
+    pd.testing.assert_frame_equal(bins, _expected('bins'), check_dtype=False)
+
+
+def test_data(paths):
+    data = GrainSizeDist(paths).data()
+    pd.testing.assert_frame_equal(data, _expected('data'), check_dtype=False)
+
+
+def test_datacp(paths):
+    cp = GrainSizeDist(paths).datacp()
+    pd.testing.assert_frame_equal(cp, _expected('datacp'), check_dtype=False)
+
+
+def test_datast(paths):
+    st = GrainSizeDist(paths).datast()
+    expected = _expected('datast', index_col=0)
+    assert list(st.index) == list(expected.index)
+    assert list(st.columns) == list(expected.columns)
+
+    # numeric statistics to tolerance, classes exactly
+    for row in expected.index:
+        for col in expected.columns:
+            value, exp = st.loc[row, col], expected.loc[row, col]
+            try:
+                exp = float(exp)
+            except ValueError:
+                assert value == exp, (row, col)
+            else:
+                assert np.isclose(float(value), exp, equal_nan=True), (row, col)
+
+
+def test_datast_typed(paths):
+    gsd = GrainSizeDist(paths)
+    st, typed = gsd.datast(), gsd.datast(typed=True)
+    for key in ('sand', 'silt', 'clay', 'median', 'mean_folk', 'sorting_folk'):
+        np.testing.assert_allclose(typed[key].to_numpy(), st.loc[key].to_numpy(dtype=float))
+    assert list(typed['sediment_class'].astype(str)) == list(st.loc['sediment_class'])
+
+
+def test_changed_file(paths, tmp_path):
+    copies = [shutil.copy(p, tmp_path / os.path.basename(p)) for p in paths[:2]]
+    gsd = GrainSizeDist([str(p) for p in copies])
+    before = gsd.datast().loc['mean_folk', 'S000']
+
+    # replace first file with contents of third, as if edited on disk
+    shutil.copy(paths[2], copies[0])
+    os.utime(copies[0], ns=(os.stat(copies[0]).st_mtime_ns + 10 ** 9,) * 2)
+    after = gsd.datast().loc['mean_folk', 'S000']
+
+    fresh = GrainSizeDist([str(p) for p in copies]).datast().loc['mean_folk', 'S000']
+    assert after == fresh
+    assert after != before
+
+
+@pytest.mark.parametrize('memmap', [False, True])
+def test_frames_writable(paths, tmp_path, memmap):
+    gsd = GrainSizeDist(paths, memmap=str(tmp_path) if memmap else None)
+    data, cp = gsd.data(), gsd.datacp()
+    data.loc[0, 'S000'] = 5
+    data.iloc[:, :-1] = data.iloc[:, :-1] / 2
+    cp.loc[0, 'S000'] = 5
+    assert data.loc[0, 'S000'] == 2.5
+    assert cp.loc[0, 'S000'] == 5
+
+    # compiled data are unchanged
+    pd.testing.assert_frame_equal(gsd.data(), _expected('data'), check_dtype=False)
+    assert not gsd.datamatrix().flags.writeable
+
+
+@pytest.mark.parametrize('dtype, tol', [('float64', 1e-12), ('float32', 1e-5)])
+def test_memmap_datast(paths, tmp_path, dtype, tol):
+    memory = GrainSizeDist(paths).datast(typed=True)
+    mapped = GrainSizeDist(paths, memmap=str(tmp_path), dtype=dtype).datast(typed=True)
+    numeric = memory.select_dtypes('number').columns
+    np.testing.assert_allclose(mapped[numeric].to_numpy(), memory[numeric].to_numpy(), rtol=tol, atol=tol)
+    assert (mapped['sediment_class'] == memory['sediment_class']).all()
+
+    # saved data are reused by new objects
+    files = sorted(os.listdir(tmp_path))
+    again = GrainSizeDist(paths, memmap=str(tmp_path), dtype=dtype).datast(typed=True)
+    pd.testing.assert_frame_equal(again, mapped)
+    assert sorted(os.listdir(tmp_path)) == files
+
+
+def test_memmap_superseded(paths, tmp_path):
+    copies = [shutil.copy(p, tmp_path / os.path.basename(p)) for p in paths[:2]]
+    cache = tmp_path / 'memmap'
+    cache.mkdir()
+    gsd = GrainSizeDist([str(p) for p in copies], memmap=str(cache))
+    gsd.datacp()
+    files = sorted(os.listdir(cache))
+
+    # files of data compiled before a change on disk are replaced
+    shutil.copy(paths[2], copies[0])
+    os.utime(copies[0], ns=(os.stat(copies[0]).st_mtime_ns + 10 ** 9,) * 2)
+    gsd.datacp()
+    changed = sorted(os.listdir(cache))
+    assert len(changed) == len(files)
+    assert not set(changed) & set(files)
+    np.testing.assert_allclose(gsd.datamatrix()[0], GrainSizeDist(paths[2:]).datamatrix()[0])
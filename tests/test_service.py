@@ -0,0 +1,71 @@
+"""Tests of `grainpy.service` on localhost."""
+
+import os
+import json
+import glob
+import urllib.request
+
+import numpy as np
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+from grainpy.service import StatsService
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = StatsService(port=0, workers=1)
+    url = service.start()
+    yield service, url
+    service.stop()
+
+
+def _post(url, body, content_type):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def _get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_datast_paths(service):
+    service, url = service
+    paths = sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))
+    result = _post(url + '/datast', json.dumps({'paths': paths}).encode(), 'application/json')
+
+    st = GrainSizeDist(paths).datast()
+    assert list(result['statistics']) == list(st.columns)
+    for sample in ('S000', 'mean'):
+        assert np.isclose(result['statistics'][sample]['mean_folk'], st.loc['mean_folk', sample])
+        assert result['statistics'][sample]['sediment_class'] == st.loc['sediment_class', sample]
+
+
+def test_datast_upload(service):
+    service, url = service
+    path = os.path.join(DATA, 'S001.xlsx')
+    with open(path, 'rb') as f:
+        body = f.read()
+    result = _post(url + '/datast?name=S001.xlsx&plot=1', body, 'application/octet-stream')
+
+    st = GrainSizeDist([path]).datast()
+    assert np.isclose(result['statistics']['S001']['median'], st.loc['median', 'S001'])
+    assert set(result['plots']) == {'S001'}
+
+
+def test_metrics(service):
+    service, url = service
+    before = _get(url + '/metrics')['requests']
+    paths = [os.path.join(DATA, 'S000.xlsx')]
+    _post(url + '/datast', json.dumps({'paths': paths}).encode(), 'application/json')
+
+    metrics = _get(url + '/metrics')
+    assert metrics['requests'] == before + 1
+    assert metrics['queue_depth'] == 0
+    assert metrics['workers'] == 1
+    assert metrics['latency_ms']['max'] >= metrics['latency_ms']['p50'] > 0
@@ -0,0 +1,83 @@
+"""Tests of `grainpy.similarity`."""
+
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+from grainpy.similarity import SimilarityIndex, load_index
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def gsd():
+    return GrainSizeDist(sorted(glob.glob(os.path.join(DATA, 'S*.xlsx'))))
+
+
+def _others(gsd):
+    """Samples other than those of gsd, as a dataframe with samples as rows."""
+    values = gsd.datamatrix()
+    others = np.vstack([values[:2].mean(axis=0), values[1:].mean(axis=0)])
+    return pd.DataFrame(others, index=['M01', 'M12'])
+
+
+@pytest.mark.parametrize('metric, features', [('wasserstein', 'cumulative'), ('l1', 'cumulative'),
+                                              ('l2', 'percentiles')])
+def test_query(gsd, metric, features):
+    index = SimilarityIndex(gsd.bins()['microns'], metric, features)
+    index.add(gsd)
+    assert len(index) == 3
+
+    # every sample is its own nearest match
+    matches = index.query(gsd, k=2)
+    first = matches[matches['rank'] == 1]
+    assert list(first['sample']) == list(first['match']) == gsd.samplenames()
+    np.testing.assert_allclose(first['distance'], 0, atol=1e-9)
+    assert (matches[matches['rank'] == 2]['distance'] > 0).all()
+
+
+def test_add_rebuild(gsd):
+    index = SimilarityIndex(gsd.bins()['microns'])
+    index.add(gsd)
+    index.add(_others(gsd))
+    assert len(index) == 5
+    before = index.query(gsd, k=5)
+
+    index.rebuild()
+    after = index.query(gsd, k=5)
+    assert len(index) == 5
+    pd.testing.assert_frame_equal(after, before)
+    assert set(before['match']) == set(gsd.samplenames()) | {'M01', 'M12'}
+
+
+def test_save_load(gsd, tmp_path):
+    index = SimilarityIndex(gsd.bins()['microns'], 'l1', 'percentiles')
+    index.add(gsd)
+    index.add(_others(gsd))
+    filename = str(tmp_path / 'index.npz')
+    index.save(filename)
+
+    loaded = load_index(filename)
+    assert (loaded.metric, loaded.features, len(loaded)) == ('l1', 'percentiles', 5)
+    pd.testing.assert_frame_equal(loaded.query(gsd, k=3), index.query(gsd, k=3))
+
+
+def test_empty(gsd, tmp_path):
+    index = SimilarityIndex(gsd.bins()['microns'])
+    with pytest.raises(ValueError, match='empty'):
+        index.query(gsd)
+
+    filename = str(tmp_path / 'empty.npz')
+    index.save(filename)
+    assert len(load_index(filename)) == 0
+
+
+def test_bins_mismatch(gsd):
+    index = SimilarityIndex(gsd.bins()['microns'][:-1])
+    with pytest.raises(ValueError, match='bins'):
+        index.add(gsd)
@@ -0,0 +1,197 @@
+"""Tests of statistics of `grainpy.grainsize`."""
+
+import os
+import glob
+import shutil
+
+import numpy as np
+import pytest
+from scipy.interpolate import PchipInterpolator
+
+from grainpy.grainsize import GrainSizeDist, _pchip_slopes
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def paths():
+    return sorted(glob.glob(os.path.join(DATA, 'S*.xlsx')))
+
+
+def test_pchip_slopes(paths):
+    gsd = GrainSizeDist(paths)
+    phi = gsd.bins()['phi'].to_numpy()
+    cp = gsd.datacp().to_numpy().T
+
+    slopes = _pchip_slopes(cp, phi)
+    for row, s in zip(cp, slopes):
+        np.testing.assert_allclose(s, PchipInterpolator(phi, row).derivative()(phi), atol=1e-9)
+
+
+def test_pchip_percentiles(paths):
+    gsd = GrainSizeDist(paths)
+    phi = gsd.bins()['phi'].to_numpy()
+    cp = gsd.datacp()
+    q = [5, 10, 16, 50, 84, 90, 95]
+
+    # percentiles invert the curves through cumulative percentages
+    pct = gsd.percentiles(q, interp='pchip')
+    assert list(pct.index) == list(cp.columns)
+    for sample in pct.index:
+        curve = PchipInterpolator(phi, cp[sample].to_numpy())
+        np.testing.assert_allclose(curve(pct.loc[sample].to_numpy()), q, atol=1e-6)
+
+
+@pytest.fixture
+def runs(paths, tmp_path):
+    """Replicate runs 'A_01' and 'A_02' of sample A, and one run of sample B."""
+    return [shutil.copy(p, str(tmp_path / (name + '.xlsx')))
+            for p, name in zip(paths, ['A_01', 'A_02', 'B_01'])]
+
+
+def test_replicates(paths, runs):
+    gsd = GrainSizeDist(runs, replicates=r'(.+)_\d+$')
+    assert gsd.samplenames() == ['A', 'B']
+
+    values = GrainSizeDist(paths).datamatrix()
+    np.testing.assert_allclose(gsd.datamatrix(), [values[:2].mean(axis=0), values[2]])
+    data = gsd.data()
+    assert list(data.columns) == ['A', 'B', 'mean']
+    assert list(gsd.datast().columns) == ['A', 'B', 'mean']
+
+    bins_sd, stats_sd = gsd.replicate_spread()
+    assert bins_sd.shape == (values.shape[1], 2)
+    assert list(bins_sd.columns) == ['A', 'B']
+    np.testing.assert_allclose(bins_sd['A'], values[:2].std(axis=0, ddof=1), atol=1e-12)
+    assert bins_sd['B'].isna().all()
+
+    st = GrainSizeDist(paths).datast(typed=True)
+    assert list(stats_sd.index) == ['A', 'B']
+    assert list(stats_sd['n']) == [2, 1]
+    assert stats_sd.loc['A', 'mean_folk'] == pytest.approx(st['mean_folk'].iloc[:2].std())
+
+
+def test_replicates_parameters(runs):
+    # spread of data compiled with other parameters, here fewer rows
+    gsd = GrainSizeDist(runs, replicates=r'(.+)_\d+$')
+    bins_sd, stats_sd = gsd.replicate_spread(data_rows=80)
+    assert bins_sd.shape == (80, 2)
+    assert gsd.data(data_rows=80).shape == (80, 3)
+
+
+def test_groupby(paths):
+    gsd = GrainSizeDist(paths, lith=['a', 'a', 'b'], area='X')
+    values = gsd.datamatrix()
+    groups = gsd.groupby('lith')
+
+    assert groups.names() == ['a', 'b']
+    assert list(groups.size()) == [2, 1]
+    mean = groups.mean()
+    np.testing.assert_allclose(mean['a'], values[:2].mean(axis=0))
+    np.testing.assert_allclose(mean['b'], values[2])
+    np.testing.assert_allclose(groups.mean(cumulative=True)['a'], values[:2].cumsum(axis=1).mean(axis=0))
+
+    sem = groups.sem()
+    np.testing.assert_allclose(sem['a'], values[:2].std(axis=0, ddof=1) / np.sqrt(2))
+    lower, upper = groups.ci()
+    assert (lower['a'] <= mean['a']).all() and (mean['a'] <= upper['a']).all()
+
+    st = groups.datast()
+    assert list(st.columns) == ['a', 'b']
+    assert st.loc['mean_folk', 'b'] == pytest.approx(gsd.datast().loc['mean_folk', 'S002'])
+
+    group = groups.get_group('a')
+    assert group.samplenames() == ['S000', 'S001']
+    np.testing.assert_allclose(group.datamatrix(), values[:2])
+
+
+def test_groupby_changed_file(paths, tmp_path):
+    copies = [shutil.copy(p, str(tmp_path)) for p in paths[:2]]
+    groups = GrainSizeDist(copies, lith=['a', 'a']).groupby('lith')
+    before = groups.mean()['a'].to_numpy()
+
+    # means follow files changed on disk
+    shutil.copy(paths[2], copies[0])
+    os.utime(copies[0], ns=(os.stat(copies[0]).st_mtime_ns + 10 ** 9,) * 2)
+    after = groups.mean()['a'].to_numpy()
+    expected = GrainSizeDist(paths[1:]).datamatrix().mean(axis=0)
+    np.testing.assert_allclose(after, expected)
+    assert not np.allclose(after, before)
+
+
+def test_profile_single(paths):
+    gsd = GrainSizeDist(paths)
+    prof = gsd.profile([3.0, 1.0, 2.0], window=1)
+
+    # ordered by depth, each window a single sample with the statistics of datast()
+    assert list(prof['depth']) == [1.0, 2.0, 3.0]
+    assert list(prof['sample']) == ['S001', 'S002', 'S000']
+    assert list(prof['n']) == [1, 1, 1]
+
+    stats = gsd.datast()[list(prof['sample'])]
+    for col in ['sand', 'silt', 'clay', 'mean_folk', 'sorting_folk', 'skewness_folk', 'kurtosis_folk']:
+        np.testing.assert_allclose(prof[col].to_numpy(), stats.loc[col].to_numpy(dtype=float), atol=1e-9)
+
+
+@pytest.mark.parametrize('window', [3, 2.0])
+def test_profile_window(paths, window):
+    gsd = GrainSizeDist(paths)
+    single = gsd.profile([3.0, 1.0, 2.0], window=1)
+    prof = gsd.profile([3.0, 1.0, 2.0], window=window)
+
+    # windows of samples at depths [1, 2], [1, 2, 3], and [2, 3] either way
+    assert list(prof['n']) == [2, 3, 2]
+    for col in ['sand', 'silt', 'clay']:
+        np.testing.assert_allclose(prof[col], [single[col][:2].mean(), single[col].mean(), single[col][1:].mean()])
+
+
+def test_profile_depths(paths):
+    gsd = GrainSizeDist(paths)
+    prof = gsd.profile([2.0, np.nan, 1.0], window=1)
+    assert list(prof['sample']) == ['S002', 'S000']
+
+    with pytest.raises(ValueError, match='one value for each sample'):
+        gsd.profile([1.0, 2.0])
+
+
+@pytest.mark.parametrize('units', ['phi', 'mm', 'microns'])
+def test_percentiles(paths, units):
+    gsd = GrainSizeDist(paths)
+    phi = gsd.bins()['phi'].to_numpy()
+    cp = gsd.datacp()
+    q = [5, 10, 16, 30, 50, 60, 84, 90, 95]
+    scale = {'phi': lambda x: x, 'mm': lambda x: 2 ** -x, 'microns': lambda x: 1000 * 2 ** -x}[units]
+
+    # percent coarser, and percent finer as engineering D-values
+    coarser = gsd.percentiles(q, units=units)
+    finer = gsd.percentiles(q, units=units, finer=True)
+    assert list(coarser.columns) == q
+    for sample in cp.columns:
+        curve = cp[sample].to_numpy()
+        np.testing.assert_allclose(coarser.loc[sample], scale(np.interp(q, curve, phi)), rtol=1e-9)
+        np.testing.assert_allclose(finer.loc[sample], scale(np.interp(100 - np.array(q), curve, phi)), rtol=1e-9)
+
+
+def test_percentiles_arguments(paths):
+    gsd = GrainSizeDist(paths)
+    assert list(gsd.percentiles(2.5).columns) == [2.5]
+    with pytest.raises(ValueError, match='units'):
+        gsd.percentiles(units='inches')
+    with pytest.raises(ValueError, match='interp'):
+        gsd.percentiles(interp='cubic')
+
+
+def test_uniformity(paths):
+    gsd = GrainSizeDist(paths)
+    uni = gsd.uniformity()
+    d = gsd.percentiles((10, 30, 50, 60, 90), units='mm', finer=True)
+
+    assert list(uni.columns) == ['D10', 'D30', 'D50', 'D60', 'D90', 'Cu', 'Cc']
+    np.testing.assert_allclose(uni[['D10', 'D30', 'D50', 'D60', 'D90']], d)
+    np.testing.assert_allclose(uni['Cu'], d[60] / d[10])
+    np.testing.assert_allclose(uni['Cc'], d[30] ** 2 / (d[10] * d[60]))
+
+    # D-values coarsen with percent finer, so Cu is at least 1
+    assert (np.diff(uni[['D10', 'D30', 'D50', 'D60', 'D90']].to_numpy(), axis=1) > 0).all()
+    assert (uni['Cu'] >= 1).all()
@@ -0,0 +1,52 @@
+"""Tests of `grainpy.uncertainty`."""
+
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from grainpy.grainsize import GrainSizeDist
+from grainpy.uncertainty import uncertainty
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def gsd():
+    return GrainSizeDist(sorted(glob.glob(os.path.join(DATA, 'S*.xlsx'))))
+
+
+@pytest.mark.parametrize('interp', ['linear', 'pchip'])
+def test_split_matches_whole(gsd, interp):
+    whole = uncertainty(gsd, 0.1, n_iter=200, interp=interp, seed=5)
+
+    # realizations of each sample split into parts of one realization
+    for max_bytes in (1, 6 * 8 * gsd.datamatrix().shape[1] * 70):
+        split = uncertainty(gsd, 0.1, n_iter=200, interp=interp, seed=5, max_bytes=max_bytes)
+        pd.testing.assert_frame_equal(split.mean, whole.mean, rtol=1e-10)
+        pd.testing.assert_frame_equal(split.se, whole.se, rtol=1e-8)
+        for key, prob in whole.probabilities.items():
+            pd.testing.assert_frame_equal(split.probabilities[key], prob)
+
+
+def test_probabilities(gsd):
+    result = uncertainty(gsd, 0.05, n_iter=100, relative=True, seed=0)
+    assert result.n_iter == 100
+    assert list(result.mean.index) == gsd.samplenames()
+    assert (result.se.to_numpy() >= 0).all()
+
+    # each class statistic has one class per realization
+    for key, prob in result.probabilities.items():
+        np.testing.assert_allclose(prob.sum(axis=1), 1, err_msg=key)
+    likeliest = result.likeliest()
+    assert (likeliest['sediment_class_p'] > 0).all()
+
+
+def test_no_error(gsd):
+    result = uncertainty(gsd, 0, n_iter=10, seed=0)
+    st = gsd.datast(typed=True).iloc[:-1]
+    np.testing.assert_allclose(result.mean['mean_folk'], st['mean_folk'])
+    np.testing.assert_allclose(result.se['mean_folk'], 0, atol=1e-12)